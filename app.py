@@ -2,11 +2,17 @@
 Notebook-RAG: A Streamlit application for document chat with multiple notebooks.
 """
 
+import itertools
 import os
+import shutil
+import threading
 from dotenv import load_dotenv
 import streamlit as st
-import uuid
+from collections import deque
+from dataclasses import dataclass, field
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
+from typing import Optional
 
 from utils.paths import Paths
 from utils.config_manager import ConfigManager
@@ -29,23 +35,97 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+@st.cache_resource(show_spinner=False)
+def _all_notebook_names():
+    """List notebook names, shared by all sessions until a notebook is created or deleted."""
+    return tuple(notebook["name"] for notebook in DatabaseManager.list_notebooks())
+
+@st.cache_data(show_spinner=False)
+def _list_notebook_filenames(notebook_name):
+    """List a notebook's original filenames, cached until its files change."""
+    return [file["original_filename"] for file in DatabaseManager.get_files_by_notebook(notebook_name)]
+
+# Maximum number of chat messages kept per notebook
+CHAT_HISTORY_MAX_MESSAGES = 500
+
+@st.cache_resource(show_spinner=False)
+def _executor():
+    """Get the thread pool used to generate responses off the script thread."""
+    return ThreadPoolExecutor(max_workers=4)
+
+@st.cache_resource(show_spinner=False)
+def _warm_up_embedding_model():
+    """Load and warm up the embedding model in the background, once per process."""
+    return _executor().submit(VectorStoreManager.get_embedding_model)
+
+_warm_up_embedding_model()
+
+@dataclass
+class PendingResponse:
+    """Response being generated on a worker thread, which any rerun can stream from the start."""
+    chunks: list = field(default_factory=list)
+    message: Optional[dict] = None  # Chat history entry, set once the response is complete
+    error: Optional[Exception] = None
+    condition: threading.Condition = field(default_factory=threading.Condition)
+    
+    def iter_chunks(self):
+        """Yield the chunks received so far, then new ones until the response is complete."""
+        position = 0
+        while True:
+            with self.condition:
+                while position == len(self.chunks) and self.message is None:
+                    self.condition.wait()
+                new_chunks = self.chunks[position:]
+                complete = self.message is not None
+            position += len(new_chunks)
+            yield from new_chunks
+            if complete:
+                break
+        if self.error is not None:
+            raise self.error
+
+@dataclass
+class NotebookContext:
+    """Per-session state of a notebook."""
+    chat_history: deque = field(default_factory=lambda: deque(maxlen=CHAT_HISTORY_MAX_MESSAGES))
+    documents: Optional[list] = None  # Loaded lazily on first render
+    pending_response: Optional[PendingResponse] = None  # Response being generated
+
+def get_ctx(notebook_name):
+    """Get the session context of a notebook, creating it on first access."""
+    return st.session_state.contexts.setdefault(notebook_name, NotebookContext())
+
+def _build_notebook_index_map(notebook_names):
+    """Map notebook names to their selectbox index, after the "None" option."""
+    return {name: i + 1 for i, name in enumerate(notebook_names)}
+
+# Load app config once per run
+app_config = ConfigManager.get_app_config()
+providers_config = app_config.get("providers", {})
+provider_options = list(providers_config.keys())
+provider_index_map = {provider: i for i, provider in enumerate(provider_options)}
+model_index_maps = {
+    provider: {model: i for i, model in enumerate(provider_config.get("models", []))}
+    for provider, provider_config in providers_config.items()
+}
+
 # Initialize session state
 if "notebooks" not in st.session_state:
-    st.session_state.notebooks = [notebook["name"] for notebook in DatabaseManager.list_notebooks()]
+    st.session_state.notebooks = list(_all_notebook_names())
+if "notebook_index_map" not in st.session_state:
+    st.session_state.notebook_index_map = _build_notebook_index_map(st.session_state.notebooks)
 if "selected_notebook" not in st.session_state:
     st.session_state.selected_notebook = None
-if "chat_history" not in st.session_state:
-    st.session_state.chat_history = {}
-if "documents" not in st.session_state:
-    st.session_state.documents = {}
+if "contexts" not in st.session_state:
+    st.session_state.contexts = {}
 if "llm_provider" not in st.session_state:
-    app_config = ConfigManager.get_app_config()
     st.session_state.llm_provider = app_config.get("llm", {}).get("provider", "groq")
 if "llm_model" not in st.session_state:
-    app_config = ConfigManager.get_app_config()
     st.session_state.llm_model = app_config.get("llm", {}).get("model", "meta-llama/llama-4-scout-17b-16e-instruct")
 if "notebook_selector" not in st.session_state:
     st.session_state.notebook_selector = None
+if "vectordb_params" not in st.session_state:
+    st.session_state.vectordb_params = dict(app_config.get("vectordb", {}))
 
 def create_notebook():
     """Create a new notebook."""
@@ -81,19 +161,16 @@ def create_notebook():
         os.makedirs(Paths.get_notebook_files_dir(notebook_name), exist_ok=True)
         
         # Update notebooks list
-        st.session_state.notebooks = [notebook["name"] for notebook in DatabaseManager.list_notebooks()]
+        _all_notebook_names.clear()
+        st.session_state.notebooks = list(_all_notebook_names())
+        st.session_state.notebook_index_map = _build_notebook_index_map(st.session_state.notebooks)
         
         # Select the new notebook
         st.session_state.selected_notebook = notebook_name
         st.session_state.notebook_selector = notebook_name
         
-        # Initialize chat history for the new notebook
-        if notebook_name not in st.session_state.chat_history:
-            st.session_state.chat_history[notebook_name] = []
-        
-        # Initialize documents for the new notebook
-        if notebook_name not in st.session_state.documents:
-            st.session_state.documents[notebook_name] = []
+        # Initialize the context for the new notebook
+        get_ctx(notebook_name)
         
         # Clear the input field
         st.session_state.new_notebook_name = ""
@@ -110,47 +187,40 @@ def delete_notebook():
             # Delete the notebook from database
             DatabaseManager.delete_notebook(notebook_name)
             
+            # Drop cached answers so they aren't reused
+            ConversationManager.invalidate_response_cache(notebook_name)
+            
             # Try to delete the notebook's vector store with error handling
             try:
                 VectorStoreManager.delete_notebook(notebook_name)
             except Exception as e:
                 st.warning(f"Could not completely delete vector store: {str(e)}")
-                # Try to force close any open file handles
-                import gc
-                gc.collect()
+                # Try to force close any open file handles (only needed on Windows)
+                if os.name == "nt":
+                    import gc
+                    gc.collect()
                 
                 # Try to delete the directory manually
-                vector_db_dir = Paths.get_notebook_vector_db_dir(notebook_name)
-                if os.path.exists(vector_db_dir):
-                    try:
-                        import shutil
-                        shutil.rmtree(vector_db_dir, ignore_errors=True)
-                    except Exception:
-                        pass
+                shutil.rmtree(Paths.get_notebook_vector_db_dir(notebook_name), ignore_errors=True)
             
             # Delete the notebook's files directory
             notebook_files_dir = Paths.get_notebook_files_dir(notebook_name)
+            shutil.rmtree(notebook_files_dir, ignore_errors=True)
             if os.path.exists(notebook_files_dir):
-                try:
-                    import shutil
-                    shutil.rmtree(notebook_files_dir, ignore_errors=True)
-                except Exception as e:
-                    st.warning(f"Could not completely delete files directory: {str(e)}")
+                st.warning("Could not completely delete files directory.")
             
             # Update notebooks list
-            st.session_state.notebooks = [notebook["name"] for notebook in DatabaseManager.list_notebooks()]
+            _all_notebook_names.clear()
+            _list_notebook_filenames.clear()
+            st.session_state.notebooks = list(_all_notebook_names())
+            st.session_state.notebook_index_map = _build_notebook_index_map(st.session_state.notebooks)
             
             # Clear selected notebook
             st.session_state.selected_notebook = None
             st.session_state.notebook_selector = None if not st.session_state.notebooks else st.session_state.notebooks[0]
             
-            # Clear chat history for the deleted notebook
-            if notebook_name in st.session_state.chat_history:
-                del st.session_state.chat_history[notebook_name]
-            
-            # Clear documents for the deleted notebook
-            if notebook_name in st.session_state.documents:
-                del st.session_state.documents[notebook_name]
+            # Clear chat history and documents for the deleted notebook
+            st.session_state.contexts.pop(notebook_name, None)
             
             st.success(f"Notebook '{notebook_name}' deleted successfully.")
         except Exception as e:
@@ -169,16 +239,8 @@ def select_notebook():
     if notebook_name:
         st.session_state.selected_notebook = notebook_name
         
-        # Initialize chat history for the selected notebook
-        if notebook_name not in st.session_state.chat_history:
-            st.session_state.chat_history[notebook_name] = []
-        
-        # Load documents for the selected notebook
-        try:
-            files = DatabaseManager.get_files_by_notebook(notebook_name)
-            st.session_state.documents[notebook_name] = [file["original_filename"] for file in files]
-        except ValueError:
-            st.session_state.documents[notebook_name] = []
+        # Reload the notebook's documents when they are next rendered
+        get_ctx(notebook_name).documents = None
 
 def process_uploaded_files(uploaded_files):
     """Process uploaded files and add them to the selected notebook."""
@@ -198,28 +260,45 @@ def process_uploaded_files(uploaded_files):
     notebook_files_dir = Paths.get_notebook_files_dir(notebook_name)
     os.makedirs(notebook_files_dir, exist_ok=True)
     
-    # Process each file
+    # Generate a unique filename to store for each file, from one timestamp
+    # for the whole batch and a randomly seeded counter
+    timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
+    counter = itertools.count(int.from_bytes(os.urandom(4), "big"))
+    pending_files = []
     for uploaded_file in uploaded_files:
-        # Generate a unique filename to store
         file_extension = uploaded_file.name.split('.')[-1]
-        timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-        unique_id = str(uuid.uuid4())[:8]
-        stored_filename = f"{timestamp}_{unique_id}.{file_extension}"
+        stored_filename = f"{timestamp}_{next(counter) & 0xFFFFFFFF:08x}.{file_extension}"
         stored_file_path = os.path.join(notebook_files_dir, stored_filename)
-        
-        # Save the uploaded file to the notebook's directory
+        pending_files.append((uploaded_file, stored_filename, stored_file_path))
+    
+    def save_file(pending_file):
+        uploaded_file, _, stored_file_path = pending_file
+        uploaded_file.seek(0)
         with open(stored_file_path, "wb") as f:
-            f.write(uploaded_file.getvalue())
-        
-        # Add file to database
-        try:
-            DatabaseManager.add_file(notebook_name, uploaded_file.name, stored_filename)
+            shutil.copyfileobj(uploaded_file, f, length=1024 * 1024)
+    
+    # Save the uploaded files to the notebook's directory in parallel
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(save_file, pending_files))
+    
+    # Add all files to the database in one transaction
+    try:
+        DatabaseManager.add_files_bulk(
+            notebook_name,
+            [(uploaded_file.name, stored_filename) for uploaded_file, stored_filename, _ in pending_files]
+        )
+        for uploaded_file, _, _ in pending_files:
             st.success(f"File '{uploaded_file.name}' uploaded successfully.")
-        except ValueError as e:
-            st.error(str(e))
-            # Delete the file if there was an error
+    except ValueError as e:
+        st.error(str(e))
+        # Delete the files if there was an error
+        for _, _, stored_file_path in pending_files:
             if os.path.exists(stored_file_path):
                 os.remove(stored_file_path)
+    
+    # Invalidate the cached file list and reload it when next rendered
+    _list_notebook_filenames.clear()
+    get_ctx(notebook_name).documents = None
 
 def process_files():
     """Process files in the selected notebook."""
@@ -243,36 +322,76 @@ def process_files():
             st.info("No new files to process.")
             return
         
-        # Process each unprocessed file
-        for file in unprocessed_files:
-            file_path = os.path.join(Paths.get_notebook_files_dir(notebook_name), file["stored_filename"])
-            
+        # Extract and chunk the unprocessed files in parallel
+        notebook_files_dir = Paths.get_notebook_files_dir(notebook_name)
+        processed_files = []
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            futures = {
+                executor.submit(
+                    DocumentProcessor.process_document,
+                    os.path.join(notebook_files_dir, file["stored_filename"])
+                ): file
+                for file in unprocessed_files
+            }
+            for future in as_completed(futures):
+                file = futures[future]
+                try:
+                    processed_files.append((file, future.result()))
+                except Exception as e:
+                    st.error(f"Error processing '{file['original_filename']}': {str(e)}")
+        
+        if processed_files:
             try:
-                # Process the document
-                chunks = DocumentProcessor.process_document(file_path)
-                
-                # Add the document to the collection
-                VectorStoreManager.add_documents(
+                # Add the documents of all files to the collection in one batch
+                VectorStoreManager.add_documents_bulk(
                     collection=collection,
-                    documents=chunks,
-                    metadata=[{"source": file["original_filename"]} for _ in chunks]
+                    document_groups=[chunks for _, chunks in processed_files],
+                    metadata=[{"source": file["original_filename"]} for file, _ in processed_files]
                 )
                 
-                # Mark file as processed
-                DatabaseManager.mark_file_as_processed(file["id"])
-                
-                # Add the document to the session state if not already there
-                if notebook_name not in st.session_state.documents:
-                    st.session_state.documents[notebook_name] = []
-                if file["original_filename"] not in st.session_state.documents[notebook_name]:
-                    st.session_state.documents[notebook_name].append(file["original_filename"])
+                # Mark files as processed
+                DatabaseManager.mark_files_as_processed_bulk([file["id"] for file, _ in processed_files])
                 
-                st.success(f"Successfully processed '{file['original_filename']}' and added to notebook '{notebook_name}'.")
+                # Cached answers may be outdated now that the notebook has new documents
+                ConversationManager.invalidate_response_cache(notebook_name)
             except Exception as e:
-                st.error(f"Error processing '{file['original_filename']}': {str(e)}")
+                st.error(f"Error adding files to notebook '{notebook_name}': {str(e)}")
+                processed_files = []
+        
+        for file, _ in processed_files:
+            st.success(f"Successfully processed '{file['original_filename']}' and added to notebook '{notebook_name}'.")
+        
+        # Invalidate the cached file list and reload it when next rendered
+        _list_notebook_filenames.clear()
+        get_ctx(notebook_name).documents = None
     except ValueError as e:
         st.error(str(e))
 
+def _generate_response(ctx, pending, **query_kwargs):
+    """
+    Generate a response on a worker thread, collecting its chunks on pending and adding
+    the complete response to the chat history, so it survives reruns that interrupt streaming.
+    """
+    try:
+        for token in ConversationManager.respond_to_query_stream(**query_kwargs):
+            with pending.condition:
+                pending.chunks.append(token)
+                pending.condition.notify_all()
+    except Exception as e:
+        pending.error = e
+    finally:
+        if pending.error is None:
+            message = {"role": "assistant", "content": "".join(pending.chunks)}
+        else:
+            message = {"role": "assistant", "content": f"Error: {str(pending.error)}"}
+        # Publish the message before adding it, so render_chat never shows it twice
+        with pending.condition:
+            pending.message = message
+            pending.condition.notify_all()
+        ctx.chat_history.append(message)
+        if ctx.pending_response is pending:
+            ctx.pending_response = None
+
 def send_message():
     """Send a message to the selected notebook."""
     message = st.session_state.message_input
@@ -282,31 +401,26 @@ def send_message():
         return
     
     # Add user message to chat history
-    if notebook_name not in st.session_state.chat_history:
-        st.session_state.chat_history[notebook_name] = []
-    st.session_state.chat_history[notebook_name].append({"role": "user", "content": message})
+    ctx = get_ctx(notebook_name)
+    ctx.chat_history.append({"role": "user", "content": message})
     
-    # Get response from the model
-    try:
-        # Get vectordb parameters from config
-        app_config = ConfigManager.get_app_config()
-        vectordb_params = app_config.get("vectordb", {})
-        
-        # Generate response
-        response = ConversationManager.respond_to_query(
-            notebook_name=notebook_name,
-            query=message,
-            n_results=vectordb_params.get("n_results", 5),
-            threshold=vectordb_params.get("threshold", 0.3),
-            provider=st.session_state.llm_provider,
-            model_name=st.session_state.llm_model
-        )
-        
-        # Add assistant response to chat history
-        st.session_state.chat_history[notebook_name].append({"role": "assistant", "content": response})
-    except Exception as e:
-        # Add error message to chat history
-        st.session_state.chat_history[notebook_name].append({"role": "assistant", "content": f"Error: {str(e)}"})
+    # Get vectordb parameters from the session snapshot
+    vectordb_params = st.session_state.vectordb_params
+    
+    # Generate the response in the background; it is streamed by render_chat
+    pending = PendingResponse()
+    ctx.pending_response = pending
+    _executor().submit(
+        _generate_response,
+        ctx,
+        pending,
+        notebook_name=notebook_name,
+        query=message,
+        n_results=vectordb_params.get("n_results", 5),
+        threshold=vectordb_params.get("threshold", 0.3),
+        provider=st.session_state.llm_provider,
+        model_name=st.session_state.llm_model
+    )
 
 def update_llm_settings():
     """Update LLM settings."""
@@ -317,6 +431,58 @@ def update_llm_settings():
     st.session_state.llm_model = model
     
     st.success(f"LLM settings updated: Provider: {provider}, Model: {model}")
+def update_retrieval_settings():
+    """Update retrieval settings."""
+    n_results = st.session_state.n_results_selector
+    threshold = st.session_state.threshold_selector
+    
+    st.session_state.vectordb_params["n_results"] = n_results
+    st.session_state.vectordb_params["threshold"] = threshold
+    
+    st.success(f"Retrieval settings updated: Results: {n_results}, Threshold: {threshold}")
+
+@st.fragment
+def render_documents(notebook_name):
+    """Render the list of documents in a notebook."""
+    ctx = get_ctx(notebook_name)
+    if ctx.documents is None:
+        try:
+            ctx.documents = _list_notebook_filenames(notebook_name)
+        except ValueError:
+            ctx.documents = []
+    
+    documents = ctx.documents
+    if documents:
+        st.subheader("Documents")
+        for doc in documents:
+            st.write(f"- {doc}")
+
+@st.fragment
+def render_chat(notebook_name):
+    """Render the chat history and message input for a notebook."""
+    st.subheader("Chat")
+    
+    # Display chat history, except a response that completes while it is being streamed below
+    ctx = get_ctx(notebook_name)
+    pending = ctx.pending_response
+    for message in list(ctx.chat_history):
+        if pending is not None and message is pending.message:
+            continue
+        if message["role"] == "user":
+            st.chat_message("user").write(message["content"])
+        else:
+            st.chat_message("assistant").write(message["content"])
+    
+    # Stream the response that is being generated, if any; the worker adds it to the chat history
+    if pending is not None:
+        with st.chat_message("assistant"):
+            try:
+                st.write_stream(pending.iter_chunks())
+            except Exception as e:
+                st.write(f"Error: {str(e)}")
+    
+    # Message input
+    st.chat_input("Ask a question about your documents", key="message_input", on_submit=send_message)
 
 # Sidebar
 with st.sidebar:
@@ -336,7 +502,7 @@ with st.sidebar:
         st.selectbox(
             "Choose a notebook",
             options=options,
-            index=0 if st.session_state.notebook_selector is None else options.index(st.session_state.notebook_selector) if st.session_state.notebook_selector in options else 0,
+            index=st.session_state.notebook_index_map.get(st.session_state.notebook_selector, 0),
             key="notebook_selector",
             on_change=select_notebook
         )
@@ -364,16 +530,11 @@ with st.sidebar:
     # LLM Settings
     st.subheader("LLM Settings")
     
-    # Get available providers and models from config
-    app_config = ConfigManager.get_app_config()
-    providers_config = app_config.get("providers", {})
-    
     # Provider selector
-    provider_options = list(providers_config.keys())
     st.selectbox(
         "LLM Provider",
         options=provider_options,
-        index=provider_options.index(st.session_state.llm_provider) if st.session_state.llm_provider in provider_options else 0,
+        index=provider_index_map.get(st.session_state.llm_provider, 0),
         key="llm_provider_selector"
     )
     
@@ -384,12 +545,31 @@ with st.sidebar:
     st.selectbox(
         "LLM Model",
         options=model_options,
-        index=model_options.index(st.session_state.llm_model) if st.session_state.llm_model in model_options else 0,
+        index=model_index_maps.get(selected_provider, {}).get(st.session_state.llm_model, 0),
         key="llm_model_selector"
     )
     
     st.button("Update LLM Settings", on_click=update_llm_settings)
     
+    # Retrieval Settings
+    with st.expander("Advanced Settings"):
+        st.number_input(
+            "Number of results",
+            min_value=1,
+            max_value=50,
+            value=int(st.session_state.vectordb_params.get("n_results", 5)),
+            key="n_results_selector"
+        )
+        st.slider(
+            "Distance threshold",
+            min_value=0.0,
+            max_value=2.0,
+            value=float(st.session_state.vectordb_params.get("threshold", 0.3)),
+            step=0.05,
+            key="threshold_selector"
+        )
+        st.button("Update Retrieval Settings", on_click=update_retrieval_settings)
+    
     st.markdown("---")
 
 
@@ -398,24 +578,10 @@ if st.session_state.selected_notebook:
     st.title(f"Notebook: {st.session_state.selected_notebook}")
     
     # Display documents
-    if st.session_state.selected_notebook in st.session_state.documents and st.session_state.documents[st.session_state.selected_notebook]:
-        st.subheader("Documents")
-        for doc in st.session_state.documents[st.session_state.selected_notebook]:
-            st.write(f"- {doc}")
+    render_documents(st.session_state.selected_notebook)
     
     # Chat interface
-    st.subheader("Chat")
-    
-    # Display chat history
-    if st.session_state.selected_notebook in st.session_state.chat_history:
-        for message in st.session_state.chat_history[st.session_state.selected_notebook]:
-            if message["role"] == "user":
-                st.chat_message("user").write(message["content"])
-            else:
-                st.chat_message("assistant").write(message["content"])
-    
-    # Message input
-    st.chat_input("Ask a question about your documents", key="message_input", on_submit=send_message)
+    render_chat(st.session_state.selected_notebook)
 else:
     st.title("Welcome to Notebook-RAG")
     st.write("Please select or create a notebook to get started.")
@@ -0,0 +1,9 @@
+"""
+Test configuration for Notebook-RAG.
+"""
+
+import os
+import sys
+
+# Make the application packages importable from the tests
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,60 @@
+"""
+Tests for vector store management.
+"""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("torch")
+pytest.importorskip("chromadb")
+pytest.importorskip("langchain_huggingface")
+
+from utils import vector_store_manager
+from utils.vector_store_manager import VectorStoreManager
+
+class FakeCollection:
+    """In-memory stand-in for a ChromaDB collection."""
+    
+    def __init__(self):
+        self.rows = {}
+    
+    def count(self):
+        return len(self.rows)
+    
+    def add(self, embeddings, ids, documents, metadatas=None):
+        for id_, document in zip(ids, documents):
+            self.rows[id_] = document
+    
+    def delete(self, ids):
+        for id_ in ids:
+            self.rows.pop(id_, None)
+
+def test_add_documents_removes_earlier_batches_when_a_batch_fails(monkeypatch):
+    monkeypatch.setattr(vector_store_manager, "_ADD_BATCH_SIZE", 2)
+    calls = []
+    
+    def embed_documents(documents):
+        calls.append(documents)
+        if len(calls) == 2:
+            raise RuntimeError("embedding failed")
+        return np.zeros((len(documents), 4), dtype=np.float32)
+    
+    monkeypatch.setattr(VectorStoreManager, "embed_documents", staticmethod(embed_documents))
+    collection = FakeCollection()
+    
+    with pytest.raises(RuntimeError, match="embedding failed"):
+        VectorStoreManager.add_documents(collection, ["a", "b", "c", "d", "e"])
+    
+    assert len(calls) == 2
+    assert collection.count() == 0
+
+def test_embed_documents_of_no_documents_is_empty(monkeypatch):
+    def encode_documents(documents):
+        raise AssertionError("the model should not run for no documents")
+    
+    monkeypatch.setattr(VectorStoreManager, "_encode_documents", staticmethod(encode_documents))
+    
+    embeddings = VectorStoreManager.embed_documents([])
+    
+    assert embeddings.shape[0] == 0
+    assert embeddings.dtype == np.float32
@@ -2,14 +2,47 @@
 Configuration management for Notebook-RAG application.
 """
 
+import mmap
 import os
 import yaml
+from functools import lru_cache
 from pathlib import Path
 from dotenv import load_dotenv
 from typing import Dict, Any, Optional
 
 from .paths import Paths
 
+# Prefer the libyaml-backed loader, falling back to the pure-Python one
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+
+
+@lru_cache(maxsize=8)
+def _load_yaml_cached(file_path: str, mtime: float) -> Dict[str, Any]:
+    """
+    Parse a YAML file, memoized on its path and modification time.
+    
+    Args:
+        file_path: Path to the YAML file.
+        mtime: Modification time of the file, so edits invalidate the cache.
+        
+    Returns:
+        Parsed YAML content as a dictionary.
+    """
+    try:
+        with open(file_path, "rb") as file:
+            # mmap cannot map an empty file, which parses to None anyway
+            if os.fstat(file.fileno()).st_size == 0:
+                return None
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped_file:
+                return yaml.load(mapped_file, Loader=SafeLoader)
+    except yaml.YAMLError as e:
+        raise yaml.YAMLError(f"Error parsing YAML file: {e}") from e
+    except IOError as e:
+        raise IOError(f"Error reading YAML file: {e}") from e
+
 class ConfigManager:
     """Class for managing application configuration."""
     
@@ -29,20 +62,15 @@ class ConfigManager:
             yaml.YAMLError: If there's an error parsing YAML.
             IOError: If there's an error reading the file.
         """
-        file_path = Path(file_path)
-        
-        # Check if file exists
-        if not file_path.exists():
-            raise FileNotFoundError(f"YAML config file not found: {file_path}")
-        
-        # Read and parse the YAML file
+        # Keep plain strings on this per-rerun path; one stat both checks existence and gets the mtime
+        file_path = os.fspath(file_path)
         try:
-            with open(file_path, "r", encoding="utf-8") as file:
-                return yaml.safe_load(file)
-        except yaml.YAMLError as e:
-            raise yaml.YAMLError(f"Error parsing YAML file: {e}") from e
-        except IOError as e:
-            raise IOError(f"Error reading YAML file: {e}") from e
+            mtime = os.path.getmtime(file_path)
+        except FileNotFoundError:
+            raise FileNotFoundError(f"YAML config file not found: {file_path}") from None
+        
+        # Read and parse the YAML file (cached until the file changes)
+        return _load_yaml_cached(file_path, mtime)
     
     @staticmethod
     def load_env(api_key_type: str = "GROQ_API_KEY") -> None:
@@ -2,14 +2,152 @@
 Conversation management for Notebook-RAG application.
 """
 
-from typing import Optional
-from langchain_groq import ChatGroq
-from langchain_ollama import ChatOllama
+import asyncio
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
 
 from .vector_store_manager import VectorStoreManager
 from .prompt_builder import PromptBuilder
+from .prompt_compressor import PromptCompressor
 from .config_manager import ConfigManager
 
+NO_RELEVANT_DOCUMENTS_RESPONSE = "I couldn't find any relevant information in this notebook to answer your question."
+
+class _SemanticCache:
+    """Bounded cache of responses, looked up by cosine similarity of query embeddings."""
+    
+    def __init__(self):
+        self._entries: Dict[Tuple[str, ...], "OrderedDict[int, Tuple[np.ndarray, str, float]]"] = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def _normalize(embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+    
+    def check(
+        self,
+        key: Tuple[str, ...],
+        query_embedding: List[float],
+        threshold: float,
+        ttl_seconds: float,
+    ) -> Optional[str]:
+        """
+        Look up a cached response for a semantically similar query.
+        
+        Args:
+            key: Cache namespace, starting with the notebook name.
+            query_embedding: Embedding of the query.
+            threshold: Minimum cosine similarity for a hit.
+            ttl_seconds: Maximum age of a cached response.
+            
+        Returns:
+            The cached response, or None on a miss.
+        """
+        query_vector = self._normalize(query_embedding)
+        with self._lock:
+            entries = self._entries.get(key)
+            if not entries:
+                return None
+            
+            # Drop expired entries
+            expired_before = time.monotonic() - ttl_seconds
+            for entry_id in [entry_id for entry_id, (_, _, stored_at) in entries.items() if stored_at < expired_before]:
+                del entries[entry_id]
+            if not entries:
+                return None
+            
+            entry_ids = list(entries)
+            scores = np.stack([entries[entry_id][0] for entry_id in entry_ids]) @ query_vector
+            best = int(np.argmax(scores))
+            if scores[best] < threshold:
+                return None
+            
+            entries.move_to_end(entry_ids[best])
+            return entries[entry_ids[best]][1]
+    
+    def store(
+        self,
+        key: Tuple[str, ...],
+        query_embedding: List[float],
+        response: str,
+        max_entries: int,
+    ) -> None:
+        """
+        Cache a response, evicting the least recently used entries beyond max_entries.
+        
+        Args:
+            key: Cache namespace, starting with the notebook name.
+            query_embedding: Embedding of the query.
+            response: Response text to cache.
+            max_entries: Maximum number of entries kept for the namespace.
+        """
+        query_vector = self._normalize(query_embedding)
+        with self._lock:
+            entries = self._entries.setdefault(key, OrderedDict())
+            entries[self._next_id] = (query_vector, response, time.monotonic())
+            self._next_id += 1
+            while len(entries) > max_entries:
+                entries.popitem(last=False)
+    
+    def invalidate(self, notebook_name: str) -> None:
+        """
+        Drop all cached responses for a notebook.
+        
+        Args:
+            notebook_name: Name of the notebook.
+        """
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == notebook_name]:
+                del self._entries[key]
+
+_response_cache = _SemanticCache()
+
+@lru_cache(maxsize=16)
+def _build_llm(
+    provider: str,
+    model_name: str,
+    base_url: Optional[str] = None,
+    keep_alive: Optional[str] = None,
+):
+    """
+    Build a language model client, reused across calls with the same settings.
+    
+    Args:
+        provider: LLM provider name.
+        model_name: Model name to use.
+        base_url: Optional server URL (Ollama only).
+        keep_alive: Optional time the model stays loaded between requests (Ollama only).
+        
+    Returns:
+        Language model instance.
+    """
+    # Provider packages are imported on first use so unused ones cost nothing
+    if provider == "groq":
+        from langchain_groq import ChatGroq
+        return ChatGroq(model=model_name)
+
+    elif provider == "ollama":
+        from langchain_ollama import ChatOllama
+        return ChatOllama(model=model_name, base_url=base_url, keep_alive=keep_alive)
+
+    else:
+        raise Exception("Invalid LLM provider")
+
+# Async clients pool connections on the loop that first used them, so they are kept per event loop
+_async_llms: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Tuple[Any, ...], Any]]" = (
+    weakref.WeakKeyDictionary()
+)
+_async_llms_lock = threading.Lock()
+
 class ConversationManager:
     """Class for managing conversations with documents."""
     
@@ -18,12 +156,58 @@ class ConversationManager:
         """
         Get a language model instance based on the configuration.
         
+        Instances are memoized per (provider, model_name), so repeated queries
+        reuse the same client and its HTTP connection pool.
+        
+        Args:
+            provider: Optional LLM provider. If not provided, will use the one from config.
+            model_name: Optional model name to use. If not provided, will use the one from config.
+            
+        Returns:
+            Language model instance.
+        """
+        return _build_llm(*ConversationManager._get_llm_settings(provider, model_name))
+    
+    @staticmethod
+    def get_async_llm(provider: Optional[str], model_name: Optional[str] = None):
+        """
+        Get a language model instance for async calls on the running event loop.
+        
+        Instances are memoized per event loop, because their async HTTP connections
+        belong to the loop that opened them; sharing one across loops (e.g. a
+        separate asyncio.run per call) fails once the first loop is closed.
+        
         Args:
+            provider: Optional LLM provider. If not provided, will use the one from config.
             model_name: Optional model name to use. If not provided, will use the one from config.
             
         Returns:
             Language model instance.
         """
+        loop = asyncio.get_running_loop()
+        settings = ConversationManager._get_llm_settings(provider, model_name)
+        with _async_llms_lock:
+            loop_llms = _async_llms.setdefault(loop, {})
+            llm = loop_llms.get(settings)
+            if llm is None:
+                llm = loop_llms[settings] = _build_llm.__wrapped__(*settings)
+        return llm
+    
+    @staticmethod
+    def _get_llm_settings(
+        provider: Optional[str],
+        model_name: Optional[str],
+    ) -> Tuple[str, str, Optional[str], Optional[str]]:
+        """
+        Resolve the settings used to build a language model, falling back to the config.
+        
+        Args:
+            provider: Optional LLM provider.
+            model_name: Optional model name.
+            
+        Returns:
+            The provider, model name, base URL and keep-alive to build the model with.
+        """
         # Get config
         app_config = ConfigManager.get_app_config()
         llm_config = app_config.get("llm", {})
@@ -34,51 +218,181 @@ class ConversationManager:
         if not model_name:
             model_name = llm_config.get("model", "meta-llama/llama-4-scout-17b-16e-instruct")
         
-        if provider == "groq":
-            return ChatGroq(model=model_name)
-
-        elif provider == "ollama":
-            return ChatOllama(model=model_name)
-
-        else:
-            raise Exception("Invalid LLM provider")
+        if provider == "ollama":
+            ollama_config = app_config.get("providers", {}).get("ollama", {})
+            return provider, model_name, ollama_config.get("host"), ollama_config.get("keep_alive")
+        
+        return provider, model_name, None, None
 
     @staticmethod
-    def respond_to_query(
+    def get_response_cache_config() -> Optional[Dict[str, Any]]:
+        """
+        Get the response cache configuration.
+        
+        Returns:
+            The response cache configuration, or None if the cache is disabled.
+        """
+        cache_config = ConfigManager.get_app_config().get("response_cache", {})
+        return cache_config if cache_config.get("enabled", False) else None
+    
+    @staticmethod
+    def invalidate_response_cache(notebook_name: str) -> None:
+        """
+        Drop cached responses for a notebook, e.g. after its documents change.
+        
+        Args:
+            notebook_name: Name of the notebook.
+        """
+        _response_cache.invalidate(notebook_name)
+    
+    @staticmethod
+    def _response_cache_key(
+        notebook_name: str,
+        provider: Optional[str],
+        model_name: Optional[str],
+        n_results: int,
+        threshold: float,
+    ) -> Tuple[str, ...]:
+        """
+        Build the response cache namespace for a query, covering every setting that shapes the answer.
+        
+        Args:
+            notebook_name: Name of the notebook.
+            provider: LLM provider.
+            model_name: Model name.
+            n_results: Number of results to retrieve.
+            threshold: Similarity threshold.
+            
+        Returns:
+            Cache namespace, starting with the notebook name.
+        """
+        app_config = ConfigManager.get_app_config()
+        reranker_config = app_config.get("reranker", {})
+        compression_config = app_config.get("prompt_compression", {})
+        
+        retrieval_settings = [str(n_results), str(threshold)]
+        if reranker_config.get("enabled", False):
+            retrieval_settings += [
+                "rerank",
+                str(reranker_config.get("model", "BAAI/bge-reranker-base")),
+                str(reranker_config.get("candidates", 20)),
+            ]
+        if compression_config.get("enabled", False):
+            retrieval_settings += [
+                "compress",
+                str(compression_config.get("model", "microsoft/llmlingua-2-xlm-roberta-large-meetingbank")),
+                str(compression_config.get("rate", 0.6)),
+            ]
+        
+        return (notebook_name, provider or "", model_name or "", *retrieval_settings)
+    
+    @staticmethod
+    def _check_response_cache(
+        cache_key: Tuple[str, ...],
+        query: str,
+        query_embedding: Optional[List[float]] = None,
+    ) -> Tuple[Optional[List[float]], Optional[str]]:
+        """
+        Look up a cached response for a query if the response cache is enabled.
+        
+        Args:
+            cache_key: Cache namespace, starting with the notebook name.
+            query: Query text.
+            query_embedding: Optional precomputed embedding of the query.
+            
+        Returns:
+            The query embedding (None if the cache is disabled and none was
+            given) and the cached response (None on a miss).
+        """
+        cache_config = ConversationManager.get_response_cache_config()
+        if not cache_config:
+            return query_embedding, None
+        
+        if query_embedding is None:
+            query_embedding = VectorStoreManager.embed_query(query)
+        cached_response = _response_cache.check(
+            cache_key,
+            query_embedding,
+            cache_config.get("similarity_threshold", 0.92),
+            cache_config.get("ttl_seconds", 3600),
+        )
+        return query_embedding, cached_response
+    
+    @staticmethod
+    def _store_response(
+        cache_key: Tuple[str, ...],
+        query_embedding: Optional[List[float]],
+        response: str,
+    ) -> None:
+        """
+        Store a response in the response cache if it is enabled.
+        
+        Args:
+            cache_key: Cache namespace, starting with the notebook name.
+            query_embedding: Embedding of the query, or None if the cache was disabled.
+            response: Response text.
+        """
+        cache_config = ConversationManager.get_response_cache_config()
+        if cache_config and query_embedding is not None:
+            _response_cache.store(
+                cache_key, query_embedding, response, cache_config.get("max_entries", 256)
+            )
+    
+    @staticmethod
+    def build_rag_prompt(
         notebook_name: str,
         query: str,
         n_results: int = 5,
         threshold: float = 0.3,
-        provider: Optional[str] = None,
-        model_name: Optional[str] = None,
-    ) -> str:
+        query_embedding: Optional[List[float]] = None,
+    ) -> Optional[str]:
         """
-        Respond to a query using RAG.
+        Retrieve relevant documents and build the RAG prompt for a query.
         
         Args:
             notebook_name: Name of the notebook to query.
             query: Query text.
             n_results: Number of results to retrieve.
             threshold: Similarity threshold.
-            model_name: Optional model name to use.
+            query_embedding: Optional precomputed embedding of the query.
             
         Returns:
-            Response text.
+            Prompt text, or None if no relevant documents were found.
             
         Raises:
             FileNotFoundError: If the notebook does not exist.
         """
+        # Get reranker config
+        app_config = ConfigManager.get_app_config()
+        reranker_config = app_config.get("reranker", {})
+        rerank_k = reranker_config.get("candidates", 20) if reranker_config.get("enabled", False) else None
+        
         # Retrieve relevant documents
         relevant_documents = VectorStoreManager.retrieve_relevant_documents(
             notebook_name=notebook_name,
             query=query,
             n_results=n_results,
             threshold=threshold,
+            query_embedding=query_embedding,
+            rerank_k=rerank_k,
+            reranker_model=reranker_config.get("model", "BAAI/bge-reranker-base"),
         )
         
         # If no relevant documents were found
         if not relevant_documents:
-            return "I couldn't find any relevant information in this notebook to answer your question."
+            return None
+        
+        # Compress the documents to cut prompt tokens
+        compression_config = app_config.get("prompt_compression", {})
+        if compression_config.get("enabled", False):
+            relevant_documents = PromptCompressor.compress_documents(
+                documents=relevant_documents,
+                question=query,
+                rate=compression_config.get("rate", 0.6),
+                model_name=compression_config.get(
+                    "model", "microsoft/llmlingua-2-xlm-roberta-large-meetingbank"
+                ),
+            )
         
         # Get prompt config
         prompt_config = ConfigManager.get_prompt_config()
@@ -90,10 +404,49 @@ class ConversationManager:
         )
         
         # Build prompt
-        prompt = PromptBuilder.build_prompt_from_config(
+        return PromptBuilder.build_prompt_from_config(
             config=rag_assistant_prompt,
             input_data=input_data,
         )
+
+    @staticmethod
+    def respond_to_query(
+        notebook_name: str,
+        query: str,
+        n_results: int = 5,
+        threshold: float = 0.3,
+        provider: Optional[str] = None,
+        model_name: Optional[str] = None,
+    ) -> str:
+        """
+        Respond to a query using RAG.
+        
+        Args:
+            notebook_name: Name of the notebook to query.
+            query: Query text.
+            n_results: Number of results to retrieve.
+            threshold: Similarity threshold.
+            model_name: Optional model name to use.
+            
+        Returns:
+            Response text.
+            
+        Raises:
+            FileNotFoundError: If the notebook does not exist.
+        """
+        # Check the response cache
+        cache_key = ConversationManager._response_cache_key(
+            notebook_name, provider, model_name, n_results, threshold
+        )
+        query_embedding, cached_response = ConversationManager._check_response_cache(cache_key, query)
+        if cached_response is not None:
+            return cached_response
+        
+        prompt = ConversationManager.build_rag_prompt(
+            notebook_name, query, n_results, threshold, query_embedding
+        )
+        if prompt is None:
+            return NO_RELEVANT_DOCUMENTS_RESPONSE
         
         # Get LLM
         llm = ConversationManager.get_llm(provider, model_name)
@@ -101,8 +454,167 @@ class ConversationManager:
         # Generate response
         response = llm.invoke(prompt)
         
+        ConversationManager._store_response(cache_key, query_embedding, response.content)
+        
         return response.content
     
+    @staticmethod
+    def respond_to_query_stream(
+        notebook_name: str,
+        query: str,
+        n_results: int = 5,
+        threshold: float = 0.3,
+        provider: Optional[str] = None,
+        model_name: Optional[str] = None,
+        flush_interval: float = 0.05,
+    ) -> Iterator[str]:
+        """
+        Respond to a query using RAG, yielding the response as it is generated.
+        
+        Args:
+            notebook_name: Name of the notebook to query.
+            query: Query text.
+            n_results: Number of results to retrieve.
+            threshold: Similarity threshold.
+            model_name: Optional model name to use.
+            flush_interval: Minimum time in seconds between yielded chunks; tokens
+                arriving in between are merged. The first token is yielded immediately.
+            
+        Yields:
+            Chunks of the response text.
+            
+        Raises:
+            FileNotFoundError: If the notebook does not exist.
+        """
+        # Check the response cache
+        cache_key = ConversationManager._response_cache_key(
+            notebook_name, provider, model_name, n_results, threshold
+        )
+        query_embedding, cached_response = ConversationManager._check_response_cache(cache_key, query)
+        if cached_response is not None:
+            yield cached_response
+            return
+        
+        prompt = ConversationManager.build_rag_prompt(
+            notebook_name, query, n_results, threshold, query_embedding
+        )
+        if prompt is None:
+            yield NO_RELEVANT_DOCUMENTS_RESPONSE
+            return
+        
+        # Get LLM
+        llm = ConversationManager.get_llm(provider, model_name)
+        
+        # Stream response, merging tokens that arrive within flush_interval
+        response_parts = []
+        pending_parts = []
+        last_flush = 0.0
+        for chunk in llm.stream(prompt):
+            if not chunk.content:
+                continue
+            response_parts.append(chunk.content)
+            pending_parts.append(chunk.content)
+            now = time.monotonic()
+            if now - last_flush >= flush_interval:
+                yield "".join(pending_parts)
+                pending_parts.clear()
+                last_flush = now
+        if pending_parts:
+            yield "".join(pending_parts)
+        
+        ConversationManager._store_response(cache_key, query_embedding, "".join(response_parts))
+    
+    @staticmethod
+    async def respond_to_query_async(
+        notebook_name: str,
+        query: str,
+        n_results: int = 5,
+        threshold: float = 0.3,
+        provider: Optional[str] = None,
+        model_name: Optional[str] = None,
+    ) -> str:
+        """
+        Respond to a query using RAG without blocking the event loop.
+        
+        The query is embedded in a worker process, retrieval runs in a worker
+        thread and the LLM is called through its async API, so many queries
+        can be served concurrently.
+        
+        Args:
+            notebook_name: Name of the notebook to query.
+            query: Query text.
+            n_results: Number of results to retrieve.
+            threshold: Similarity threshold.
+            model_name: Optional model name to use.
+            
+        Returns:
+            Response text.
+            
+        Raises:
+            FileNotFoundError: If the notebook does not exist.
+        """
+        # Embed the query off the event loop
+        query_embedding = await VectorStoreManager.aembed_query(query)
+        
+        # Check the response cache
+        cache_key = ConversationManager._response_cache_key(
+            notebook_name, provider, model_name, n_results, threshold
+        )
+        query_embedding, cached_response = ConversationManager._check_response_cache(
+            cache_key, query, query_embedding
+        )
+        if cached_response is not None:
+            return cached_response
+        
+        prompt = await asyncio.to_thread(
+            ConversationManager.build_rag_prompt,
+            notebook_name, query, n_results, threshold, query_embedding
+        )
+        if prompt is None:
+            return NO_RELEVANT_DOCUMENTS_RESPONSE
+        
+        # Get an LLM bound to this event loop
+        llm = ConversationManager.get_async_llm(provider, model_name)
+        
+        # Generate response
+        response = await llm.ainvoke(prompt)
+        
+        ConversationManager._store_response(cache_key, query_embedding, response.content)
+        
+        return response.content
+    
+    @staticmethod
+    async def respond_to_many(
+        notebook_name: str,
+        queries: List[str],
+        n_results: int = 5,
+        threshold: float = 0.3,
+        provider: Optional[str] = None,
+        model_name: Optional[str] = None,
+    ) -> List[str]:
+        """
+        Respond to several queries on a notebook concurrently.
+        
+        Args:
+            notebook_name: Name of the notebook to query.
+            queries: Query texts.
+            n_results: Number of results to retrieve per query.
+            threshold: Similarity threshold.
+            model_name: Optional model name to use.
+            
+        Returns:
+            Response texts, in the same order as the queries.
+            
+        Raises:
+            FileNotFoundError: If the notebook does not exist.
+        """
+        return await asyncio.gather(*(
+            ConversationManager.respond_to_query_async(
+                notebook_name, query, n_results, threshold, provider, model_name
+            )
+            for query in queries
+        ))
+    
     @staticmethod
     def create_system_prompt(notebook_name: str) -> str:
         """
@@ -2,65 +2,101 @@
 Database management for Notebook-RAG application.
 """
 
+import asyncio
 import os
 import sqlite3
+import threading
+from contextlib import contextmanager
 from datetime import datetime
-from typing import List, Dict, Any, Optional, Tuple
+from typing import Iterator, List, Dict, Any, Optional, Tuple
 from pathlib import Path
 
 from .paths import Paths
 
+# One connection shared by all threads (Streamlit runs every rerun on a new
+# thread), opened on first use; the lock serializes statements and transactions
+_conn: Optional[sqlite3.Connection] = None
+_conn_lock = threading.RLock()
+
 class DatabaseManager:
     """Class for managing SQLite database operations."""
     
     @staticmethod
     def get_db_connection():
         """
-        Get a connection to the SQLite database.
+        Get the shared connection to the SQLite database, opening it on first use.
+        
+        Callers that run statements should use DatabaseManager.connection()
+        instead, which also holds the connection lock.
         
         Returns:
             sqlite3.Connection: Database connection.
         """
-        db_path = Paths.get_database_path()
-        os.makedirs(os.path.dirname(db_path), exist_ok=True)
-        conn = sqlite3.connect(db_path)
-        conn.row_factory = sqlite3.Row  # Return rows as dictionaries
-        return conn
+        global _conn
+        with _conn_lock:
+            if _conn is None:
+                db_path = Paths.get_database_path()
+                os.makedirs(os.path.dirname(db_path), exist_ok=True)
+                conn = sqlite3.connect(db_path, check_same_thread=False)
+                conn.row_factory = sqlite3.Row  # Return rows as dictionaries
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+                conn.execute("PRAGMA temp_store=MEMORY")
+                conn.execute("PRAGMA mmap_size=268435456")
+                _conn = conn
+            return _conn
+    
+    @staticmethod
+    @contextmanager
+    def connection() -> Iterator[sqlite3.Connection]:
+        """
+        Hold the shared database connection for a statement or transaction.
+        
+        Yields:
+            sqlite3.Connection: Database connection.
+        """
+        with _conn_lock:
+            yield DatabaseManager.get_db_connection()
     
     @staticmethod
     def initialize_database():
         """
         Initialize the database with required tables.
         """
-        conn = DatabaseManager.get_db_connection()
-        cursor = conn.cursor()
-        
-        # Create notebooks table
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS notebooks (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT UNIQUE NOT NULL,
-            created_at TIMESTAMP NOT NULL,
-            updated_at TIMESTAMP NOT NULL,
-            CHECK(length(name) >= 3)
-        )
-        ''')
-        
-        # Create files table
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS files (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            notebook_id INTEGER NOT NULL,
-            original_filename TEXT NOT NULL,
-            stored_filename TEXT NOT NULL,
-            upload_date TIMESTAMP NOT NULL,
-            is_processed BOOLEAN NOT NULL DEFAULT 0,
-            FOREIGN KEY (notebook_id) REFERENCES notebooks (id) ON DELETE CASCADE
-        )
-        ''')
-        
-        conn.commit()
-        conn.close()
+        with DatabaseManager.connection() as conn:
+            cursor = conn.cursor()
+            
+            # Create notebooks table
+            cursor.execute('''
+            CREATE TABLE IF NOT EXISTS notebooks (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT UNIQUE NOT NULL,
+                created_at TIMESTAMP NOT NULL,
+                updated_at TIMESTAMP NOT NULL,
+                CHECK(length(name) >= 3)
+            )
+            ''')
+            
+            # Create files table
+            cursor.execute('''
+            CREATE TABLE IF NOT EXISTS files (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                notebook_id INTEGER NOT NULL,
+                original_filename TEXT NOT NULL,
+                stored_filename TEXT NOT NULL,
+                upload_date TIMESTAMP NOT NULL,
+                is_processed BOOLEAN NOT NULL DEFAULT 0,
+                FOREIGN KEY (notebook_id) REFERENCES notebooks (id) ON DELETE CASCADE
+            )
+            ''')
+            
+            # Index files by notebook, processing state and upload date
+            cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_files_notebook
+            ON files (notebook_id, is_processed, upload_date DESC)
+            ''')
+            
+            conn.commit()
     
     @staticmethod
     def create_notebook(name: str) -> bool:
@@ -80,23 +116,21 @@ class DatabaseManager:
         if not name or len(name) < 3:
             raise ValueError("Notebook name must be at least 3 characters long.")
         
-        conn = DatabaseManager.get_db_connection()
-        cursor = conn.cursor()
-        
-        try:
-            now = datetime.now().isoformat()
-            cursor.execute(
-                "INSERT INTO notebooks (name, created_at, updated_at) VALUES (?, ?, ?)",
-                (name, now, now)
-            )
-            conn.commit()
-            return True
-        except sqlite3.IntegrityError:
-            # Notebook with this name already exists
-            conn.rollback()
-            raise ValueError(f"Notebook with name '{name}' already exists.")
-        finally:
-            conn.close()
+        with DatabaseManager.connection() as conn:
+            cursor = conn.cursor()
+            
+            try:
+                now = datetime.now().isoformat()
+                cursor.execute(
+                    "INSERT INTO notebooks (name, created_at, updated_at) VALUES (?, ?, ?)",
+                    (name, now, now)
+                )
+                conn.commit()
+                return True
+            except sqlite3.IntegrityError:
+                # Notebook with this name already exists
+                conn.rollback()
+                raise ValueError(f"Notebook with name '{name}' already exists.")
     
     @staticmethod
     def get_notebook_by_name(name: str) -> Optional[Dict[str, Any]]:
@@ -109,17 +143,15 @@ class DatabaseManager:
         Returns:
             Optional[Dict[str, Any]]: Notebook data or None if not found.
         """
-        conn = DatabaseManager.get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT * FROM notebooks WHERE name = ?", (name,))
-        notebook = cursor.fetchone()
-        
-        conn.close()
-        
-        if notebook:
-            return dict(notebook)
-        return None
+        with DatabaseManager.connection() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute("SELECT * FROM notebooks WHERE name = ?", (name,))
+            notebook = cursor.fetchone()
+            
+            if notebook:
+                return dict(notebook)
+            return None
     
     @staticmethod
     def list_notebooks() -> List[Dict[str, Any]]:
@@ -129,15 +161,13 @@ class DatabaseManager:
         Returns:
             List[Dict[str, Any]]: List of notebook data.
         """
-        conn = DatabaseManager.get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT * FROM notebooks ORDER BY updated_at DESC")
-        notebooks = [dict(row) for row in cursor.fetchall()]
-        
-        conn.close()
-        
-        return notebooks
+        with DatabaseManager.connection() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute("SELECT * FROM notebooks ORDER BY updated_at DESC")
+            notebooks = [dict(row) for row in cursor.fetchall()]
+            
+            return notebooks
     
     @staticmethod
     def update_notebook(name: str) -> bool:
@@ -150,22 +180,22 @@ class DatabaseManager:
         Returns:
             bool: True if successful, False if notebook not found.
         """
-        conn = DatabaseManager.get_db_connection()
-        cursor = conn.cursor()
-        
-        now = datetime.now().isoformat()
-        cursor.execute(
-            "UPDATE notebooks SET updated_at = ? WHERE name = ?",
-            (now, name)
-        )
-        
-        if cursor.rowcount > 0:
-            conn.commit()
-            conn.close()
-            return True
-        else:
-            conn.close()
-            return False
+        with DatabaseManager.connection() as conn:
+            cursor = conn.cursor()
+            
+            now = datetime.now().isoformat()
+            cursor.execute(
+                "UPDATE notebooks SET updated_at = ? WHERE name = ?",
+                (now, name)
+            )
+            
+            if cursor.rowcount > 0:
+                conn.commit()
+                return True
+            else:
+                # End the implicit transaction so the write lock isn't held
+                conn.rollback()
+                return False
     
     @staticmethod
     def delete_notebook(name: str) -> bool:
@@ -178,18 +208,18 @@ class DatabaseManager:
         Returns:
             bool: True if successful, False if notebook not found.
         """
-        conn = DatabaseManager.get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("DELETE FROM notebooks WHERE name = ?", (name,))
-        
-        if cursor.rowcount > 0:
-            conn.commit()
-            conn.close()
-            return True
-        else:
-            conn.close()
-            return False
+        with DatabaseManager.connection() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute("DELETE FROM notebooks WHERE name = ?", (name,))
+            
+            if cursor.rowcount > 0:
+                conn.commit()
+                return True
+            else:
+                # End the implicit transaction so the write lock isn't held
+                conn.rollback()
+                return False
     
     @staticmethod
     def add_file(notebook_name: str, original_filename: str, stored_filename: str) -> bool:
@@ -207,31 +237,55 @@ class DatabaseManager:
         Raises:
             ValueError: If the notebook does not exist.
         """
-        # Get notebook ID
-        notebook = DatabaseManager.get_notebook_by_name(notebook_name)
-        if not notebook:
-            raise ValueError(f"Notebook '{notebook_name}' does not exist.")
-        
-        conn = DatabaseManager.get_db_connection()
-        cursor = conn.cursor()
+        return DatabaseManager.add_files_bulk(notebook_name, [(original_filename, stored_filename)])
+    
+    @staticmethod
+    def add_files_bulk(notebook_name: str, files: List[Tuple[str, str]]) -> bool:
+        """
+        Add several files to a notebook in a single transaction.
         
-        try:
-            now = datetime.now().isoformat()
-            cursor.execute(
-                "INSERT INTO files (notebook_id, original_filename, stored_filename, upload_date, is_processed) VALUES (?, ?, ?, ?, ?)",
-                (notebook["id"], original_filename, stored_filename, now, False)
-            )
-            conn.commit()
+        Args:
+            notebook_name: Name of the notebook.
+            files: List of (original_filename, stored_filename) tuples.
             
-            # Update notebook's updated_at timestamp
-            DatabaseManager.update_notebook(notebook_name)
+        Returns:
+            bool: True if successful, False otherwise.
             
+        Raises:
+            ValueError: If the notebook does not exist.
+        """
+        if not files:
+            if not DatabaseManager.get_notebook_by_name(notebook_name):
+                raise ValueError(f"Notebook '{notebook_name}' does not exist.")
             return True
-        except Exception as e:
-            conn.rollback()
-            raise e
-        finally:
-            conn.close()
+        
+        with DatabaseManager.connection() as conn:
+            cursor = conn.cursor()
+            
+            try:
+                # Update notebook's updated_at timestamp first; this checks that the
+                # notebook exists and takes the write lock for the whole transaction
+                now = datetime.now().isoformat()
+                cursor.execute(
+                    "UPDATE notebooks SET updated_at = ? WHERE name = ?",
+                    (now, notebook_name)
+                )
+                if cursor.rowcount == 0:
+                    raise ValueError(f"Notebook '{notebook_name}' does not exist.")
+                
+                cursor.execute("SELECT id FROM notebooks WHERE name = ?", (notebook_name,))
+                notebook_id = cursor.fetchone()["id"]
+                
+                cursor.executemany(
+                    "INSERT INTO files (notebook_id, original_filename, stored_filename, upload_date, is_processed) VALUES (?, ?, ?, ?, ?)",
+                    [(notebook_id, original_filename, stored_filename, now, False) for original_filename, stored_filename in files]
+                )
+                conn.commit()
+                
+                return True
+            except Exception as e:
+                conn.rollback()
+                raise e
     
     @staticmethod
     def get_files_by_notebook(notebook_name: str) -> List[Dict[str, Any]]:
@@ -247,23 +301,20 @@ class DatabaseManager:
         Raises:
             ValueError: If the notebook does not exist.
         """
-        # Get notebook ID
-        notebook = DatabaseManager.get_notebook_by_name(notebook_name)
-        if not notebook:
-            raise ValueError(f"Notebook '{notebook_name}' does not exist.")
-        
-        conn = DatabaseManager.get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute(
-            "SELECT * FROM files WHERE notebook_id = ? ORDER BY upload_date DESC",
-            (notebook["id"],)
-        )
-        files = [dict(row) for row in cursor.fetchall()]
-        
-        conn.close()
-        
-        return files
+        with DatabaseManager.connection() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute(
+                "SELECT f.* FROM files f JOIN notebooks n ON f.notebook_id = n.id WHERE n.name = ? ORDER BY f.upload_date DESC",
+                (notebook_name,)
+            )
+            files = [dict(row) for row in cursor.fetchall()]
+            
+            # An empty result may mean the notebook does not exist
+            if not files and not DatabaseManager.get_notebook_by_name(notebook_name):
+                raise ValueError(f"Notebook '{notebook_name}' does not exist.")
+            
+            return files
     
     @staticmethod
     def get_unprocessed_files(notebook_name: str) -> List[Dict[str, Any]]:
@@ -279,23 +330,20 @@ class DatabaseManager:
         Raises:
             ValueError: If the notebook does not exist.
         """
-        # Get notebook ID
-        notebook = DatabaseManager.get_notebook_by_name(notebook_name)
-        if not notebook:
-            raise ValueError(f"Notebook '{notebook_name}' does not exist.")
-        
-        conn = DatabaseManager.get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute(
-            "SELECT * FROM files WHERE notebook_id = ? AND is_processed = 0 ORDER BY upload_date DESC",
-            (notebook["id"],)
-        )
-        files = [dict(row) for row in cursor.fetchall()]
-        
-        conn.close()
-        
-        return files
+        with DatabaseManager.connection() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute(
+                "SELECT f.* FROM files f JOIN notebooks n ON f.notebook_id = n.id WHERE n.name = ? AND f.is_processed = 0 ORDER BY f.upload_date DESC",
+                (notebook_name,)
+            )
+            files = [dict(row) for row in cursor.fetchall()]
+            
+            # An empty result may mean the notebook does not exist
+            if not files and not DatabaseManager.get_notebook_by_name(notebook_name):
+                raise ValueError(f"Notebook '{notebook_name}' does not exist.")
+            
+            return files
     
     @staticmethod
     def mark_file_as_processed(file_id: int) -> bool:
@@ -308,18 +356,103 @@ class DatabaseManager:
         Returns:
             bool: True if successful, False if file not found.
         """
-        conn = DatabaseManager.get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute(
-            "UPDATE files SET is_processed = 1 WHERE id = ?",
-            (file_id,)
-        )
+        with DatabaseManager.connection() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute(
+                "UPDATE files SET is_processed = 1 WHERE id = ?",
+                (file_id,)
+            )
+            
+            if cursor.rowcount > 0:
+                conn.commit()
+                return True
+            else:
+                # End the implicit transaction so the write lock isn't held
+                conn.rollback()
+                return False
+    
+    @staticmethod
+    def mark_files_as_processed_bulk(file_ids: List[int]) -> bool:
+        """
+        Mark several files as processed in a single transaction.
         
-        if cursor.rowcount > 0:
-            conn.commit()
-            conn.close()
-            return True
-        else:
-            conn.close()
+        Args:
+            file_ids: IDs of the files.
+            
+        Returns:
+            bool: True if any file was updated, False otherwise.
+        """
+        if not file_ids:
             return False
+        
+        with DatabaseManager.connection() as conn:
+            cursor = conn.cursor()
+            
+            cursor.executemany(
+                "UPDATE files SET is_processed = 1 WHERE id = ?",
+                [(file_id,) for file_id in file_ids]
+            )
+            
+            if cursor.rowcount > 0:
+                conn.commit()
+                return True
+            else:
+                # End the implicit transaction so the write lock isn't held
+                conn.rollback()
+                return False
+    
+    @staticmethod
+    async def alist_notebooks() -> List[Dict[str, Any]]:
+        """
+        List all notebooks without blocking the event loop.
+        
+        Returns:
+            List[Dict[str, Any]]: List of notebook data.
+        """
+        return await asyncio.to_thread(DatabaseManager.list_notebooks)
+    
+    @staticmethod
+    async def aget_notebook_by_name(name: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a notebook by name without blocking the event loop.
+        
+        Args:
+            name: Name of the notebook.
+            
+        Returns:
+            Optional[Dict[str, Any]]: Notebook data or None if not found.
+        """
+        return await asyncio.to_thread(DatabaseManager.get_notebook_by_name, name)
+    
+    @staticmethod
+    async def aget_files_by_notebook(notebook_name: str) -> List[Dict[str, Any]]:
+        """
+        Get all files for a notebook without blocking the event loop.
+        
+        Args:
+            notebook_name: Name of the notebook.
+            
+        Returns:
+            List[Dict[str, Any]]: List of file data.
+            
+        Raises:
+            ValueError: If the notebook does not exist.
+        """
+        return await asyncio.to_thread(DatabaseManager.get_files_by_notebook, notebook_name)
+    
+    @staticmethod
+    async def aget_unprocessed_files(notebook_name: str) -> List[Dict[str, Any]]:
+        """
+        Get all unprocessed files for a notebook without blocking the event loop.
+        
+        Args:
+            notebook_name: Name of the notebook.
+            
+        Returns:
+            List[Dict[str, Any]]: List of unprocessed file data.
+            
+        Raises:
+            ValueError: If the notebook does not exist.
+        """
+        return await asyncio.to_thread(DatabaseManager.get_unprocessed_files, notebook_name)
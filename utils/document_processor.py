@@ -2,12 +2,156 @@
 Document processing utilities for Notebook-RAG application.
 """
 
+import hashlib
+import json
+import mmap
+import multiprocessing
 import os
-from typing import List, Optional, Union
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from typing import List, Optional, Sequence, Union
 from pathlib import Path
-import PyPDF2
+import pypdfium2 as pdfium
+from langchain_core.documents import Document
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 
+from .paths import Paths
+
+# PDFium is not thread-safe, so in-process extraction is serialized
+_pdfium_lock = threading.Lock()
+
+# Text files larger than this are memory-mapped instead of read through a buffer
+MMAP_MIN_BYTES = 4 * 1024 * 1024
+
+# PDFs with fewer pages are extracted in-process, not worth spawning workers
+PARALLEL_PDF_MIN_PAGES = 4
+
+# Least recently used chunk cache files beyond this total size are removed
+CHUNK_CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+# Only one thread prunes the chunk cache at a time
+_chunk_cache_prune_lock = threading.Lock()
+
+def _prune_chunk_cache(cache_dir: str, max_bytes: int = CHUNK_CACHE_MAX_BYTES) -> None:
+    """
+    Remove the least recently used chunk cache files until the cache fits in max_bytes.
+    
+    Cache hits refresh a file's mtime, so mtime orders files by last use. This
+    bounds the cache across deleted notebooks and changed chunking parameters.
+    
+    Args:
+        cache_dir: The chunk cache directory.
+        max_bytes: Maximum total size of the cache files.
+    """
+    # Skip if another thread is already pruning
+    if not _chunk_cache_prune_lock.acquire(blocking=False):
+        return
+    try:
+        with os.scandir(cache_dir) as entries:
+            files = [
+                (entry.stat().st_mtime, entry.stat().st_size, entry.path)
+                for entry in entries
+                if entry.is_file() and entry.name.endswith(".json")
+            ]
+        
+        total_bytes = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total_bytes <= max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total_bytes -= size
+    except OSError as e:
+        print(f"Could not prune chunk cache: {str(e)}")
+    finally:
+        _chunk_cache_prune_lock.release()
+
+def _extract_pdf_pages(file_path: str, page_indices: Sequence[int]) -> List[str]:
+    """
+    Extract the text of some pages of a PDF file.
+    
+    Args:
+        file_path: Path to the PDF file.
+        page_indices: Indices of the pages to extract.
+        
+    Returns:
+        Text of each page, in the order of page_indices.
+    """
+    pdf = pdfium.PdfDocument(file_path)
+    try:
+        texts = []
+        for index in page_indices:
+            page = pdf[index]
+            text_page = page.get_textpage()
+            texts.append(text_page.get_text_range().replace("\r\n", "\n"))
+            text_page.close()
+            page.close()
+        return texts
+    finally:
+        pdf.close()
+
+@lru_cache(maxsize=8)
+def _get_splitter(chunk_size: int, chunk_overlap: int) -> RecursiveCharacterTextSplitter:
+    """
+    Get a text splitter, built once per (chunk_size, chunk_overlap).
+    
+    Args:
+        chunk_size: Maximum size of each chunk.
+        chunk_overlap: Overlap between chunks.
+        
+    Returns:
+        The text splitter.
+    """
+    return RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+    )
+
+# Worker pool for PDF extraction, created on first use; the lock makes concurrent
+# first calls (process_files extracts several files at once) share one pool
+_pdf_pool: Optional[ProcessPoolExecutor] = None
+_pdf_pool_lock = threading.Lock()
+
+def _get_pdf_pool() -> ProcessPoolExecutor:
+    """
+    Get the worker pool used for PDF extraction, created once per process.
+    
+    Workers are spawned rather than forked so they never inherit PDFium state
+    from a thread that is extracting in-process.
+    
+    Returns:
+        The process pool.
+    """
+    global _pdf_pool
+    pool = _pdf_pool
+    if pool is None:
+        with _pdf_pool_lock:
+            if _pdf_pool is None:
+                _pdf_pool = ProcessPoolExecutor(
+                    max_workers=os.cpu_count() or 1,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            pool = _pdf_pool
+    return pool
+
+def _discard_pdf_pool(pool: ProcessPoolExecutor) -> None:
+    """
+    Discard a broken PDF worker pool, so the next extraction creates a new one.
+    
+    Args:
+        pool: The pool that broke; a replacement created meanwhile is kept.
+    """
+    global _pdf_pool
+    with _pdf_pool_lock:
+        if _pdf_pool is pool:
+            _pdf_pool = None
+    pool.shutdown(wait=False)
+
 class DocumentProcessor:
     """Class for processing documents (PDF, TXT, MD) and splitting them into chunks."""
     
@@ -32,14 +176,39 @@ class DocumentProcessor:
         if not file_path.exists():
             raise FileNotFoundError(f"PDF file not found: {file_path}")
         
-        # Extract text from PDF
+        # Extract text from PDF, splitting large files across worker processes
         try:
-            text = ""
-            with open(file_path, "rb") as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                for page in pdf_reader.pages:
-                    text += page.extract_text() + "\n"
-            return text
+            with _pdfium_lock:
+                pdf = pdfium.PdfDocument(str(file_path))
+                page_count = len(pdf)
+                pdf.close()
+                
+                if page_count < PARALLEL_PDF_MIN_PAGES:
+                    pages = _extract_pdf_pages(str(file_path), range(page_count))
+            
+            if page_count >= PARALLEL_PDF_MIN_PAGES:
+                # Each worker opens the file once and extracts every n-th page
+                max_workers = min(os.cpu_count() or 1, page_count)
+                page_batches = [range(i, page_count, max_workers) for i in range(max_workers)]
+                pool = _get_pdf_pool()
+                try:
+                    batch_texts = list(pool.map(
+                        _extract_pdf_pages, [str(file_path)] * max_workers, page_batches
+                    ))
+                except BrokenProcessPool:
+                    # A worker died (e.g. crashed or ran out of memory on a malformed PDF);
+                    # replace the pool for later files and extract this one in-process
+                    _discard_pdf_pool(pool)
+                    with _pdfium_lock:
+                        batch_texts = [_extract_pdf_pages(str(file_path), batch) for batch in page_batches]
+                
+                # Restore page order from the interleaved batches
+                pages = [""] * page_count
+                for batch, texts in zip(page_batches, batch_texts):
+                    for index, text in zip(batch, texts):
+                        pages[index] = text
+            
+            return "\n".join(pages) + "\n"
         except Exception as e:
             raise IOError(f"Error reading PDF file: {e}") from e
     
@@ -64,10 +233,23 @@ class DocumentProcessor:
         if not file_path.exists():
             raise FileNotFoundError(f"TXT file not found: {file_path}")
         
-        # Read text from TXT file
+        # Read text from TXT file; invalid UTF-8 bytes are replaced rather than
+        # failing the whole document
         try:
-            with open(file_path, "r", encoding="utf-8") as file:
-                return file.read()
+            if file_path.stat().st_size < MMAP_MIN_BYTES:
+                with open(file_path, "r", encoding="utf-8", errors="replace") as file:
+                    return file.read()
+            
+            # Decode large files straight from the mapped pages, skipping the
+            # intermediate bytes copy
+            with open(file_path, "rb") as file:
+                with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped_file:
+                    text = str(mapped_file, "utf-8", "replace")
+            
+            # Match the universal newline handling of text mode
+            if "\r" in text:
+                text = text.replace("\r\n", "\n").replace("\r", "\n")
+            return text
         except IOError as e:
             raise IOError(f"Error reading TXT file: {e}") from e
     
@@ -135,25 +317,43 @@ class DocumentProcessor:
         Returns:
             List of text chunks.
         """
-        text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=chunk_size,
-            chunk_overlap=chunk_overlap,
-        )
-        return text_splitter.split_text(text)
+        return _get_splitter(chunk_size, chunk_overlap).split_text(text)
+    
+    @staticmethod
+    def hash_file(file_path: Union[str, Path]) -> str:
+        """
+        Compute the SHA-256 hash of a file's contents.
+        
+        Args:
+            file_path: Path to the file.
+            
+        Returns:
+            Hex digest of the file contents.
+        """
+        digest = hashlib.sha256()
+        with open(file_path, "rb") as file:
+            while block := file.read(1024 * 1024):
+                digest.update(block)
+        return digest.hexdigest()
     
     @staticmethod
     def process_document(
         file_path: Union[str, Path],
         chunk_size: int = 1000,
-        chunk_overlap: int = 200
+        chunk_overlap: int = 200,
+        use_cache: bool = True
     ) -> List[str]:
         """
         Process a document by extracting text and splitting it into chunks.
         
+        Chunks are cached on disk by file content hash and chunking parameters,
+        so unchanged files skip extraction and splitting.
+        
         Args:
             file_path: Path to the document.
             chunk_size: Maximum size of each chunk.
             chunk_overlap: Overlap between chunks.
+            use_cache: Whether to read and write the chunk cache.
             
         Returns:
             List of text chunks.
@@ -163,8 +363,72 @@ class DocumentProcessor:
             FileNotFoundError: If the file does not exist.
             IOError: If there's an error reading the file.
         """
+        cache_path = None
+        if use_cache and Path(file_path).exists():
+            file_hash = DocumentProcessor.hash_file(file_path)
+            cache_path = os.path.join(
+                Paths.get_chunk_cache_dir(), f"{file_hash}_{chunk_size}_{chunk_overlap}.json"
+            )
+            
+            # Return cached chunks if available, marking them as recently used
+            try:
+                with open(cache_path, "r", encoding="utf-8") as cache_file:
+                    chunks = json.load(cache_file)
+                os.utime(cache_path)
+                return chunks
+            except (OSError, ValueError):
+                pass
+        
         # Extract text from file
         text = DocumentProcessor.extract_text_from_file(file_path)
         
         # Split text into chunks
-        return DocumentProcessor.chunk_text(text, chunk_size, chunk_overlap)
+        chunks = DocumentProcessor.chunk_text(text, chunk_size, chunk_overlap)
+        
+        # Cache the chunks, writing atomically so readers never see a partial file
+        if cache_path:
+            try:
+                os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+                with tempfile.NamedTemporaryFile(
+                    "w", encoding="utf-8", dir=os.path.dirname(cache_path), suffix=".tmp", delete=False
+                ) as temp_file:
+                    json.dump(chunks, temp_file)
+                os.replace(temp_file.name, cache_path)
+            except OSError as e:
+                print(f"Could not cache chunks for {file_path}: {str(e)}")
+            else:
+                _prune_chunk_cache(os.path.dirname(cache_path))
+        
+        return chunks
+    
+    @staticmethod
+    def process_documents(
+        file_paths: List[Union[str, Path]],
+        chunk_size: int = 1000,
+        chunk_overlap: int = 200
+    ) -> List[Document]:
+        """
+        Process several documents, extracting their text concurrently and splitting it in one batch.
+        
+        Args:
+            file_paths: Paths to the documents.
+            chunk_size: Maximum size of each chunk.
+            chunk_overlap: Overlap between chunks.
+            
+        Returns:
+            List of chunk documents, each with its file path as "source" metadata.
+            
+        Raises:
+            ValueError: If a file extension is not supported.
+            FileNotFoundError: If a file does not exist.
+            IOError: If there's an error reading a file.
+        """
+        # Extract text from files
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            texts = list(executor.map(DocumentProcessor.extract_text_from_file, file_paths))
+        
+        # Split all texts into chunks
+        return _get_splitter(chunk_size, chunk_overlap).create_documents(
+            texts,
+            metadatas=[{"source": str(file_path)} for file_path in file_paths]
+        )
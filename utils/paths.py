@@ -3,7 +3,22 @@ Path configuration for Notebook-RAG application.
 """
 
 import os
-from pathlib import Path
+from functools import lru_cache
+
+# Resolved once at import; these never change while the app runs
+_UTILS_DIR = os.path.dirname(os.path.abspath(__file__))
+_APP_DIR = os.path.dirname(_UTILS_DIR)
+_ROOT_DIR = os.path.dirname(_APP_DIR)
+_ENV_PATH = os.path.join(_ROOT_DIR, ".env")
+_CONFIG_DIR = os.path.join(_APP_DIR, "config")
+_APP_CONFIG_PATH = os.path.join(_CONFIG_DIR, "config.yaml")
+_PROMPT_CONFIG_PATH = os.path.join(_CONFIG_DIR, "prompt_config.yaml")
+_DATA_DIR = os.path.join(_APP_DIR, "data")
+_CHUNK_CACHE_DIR = os.path.join(_DATA_DIR, "chunk_cache")
+_VECTOR_DB_DIR = os.path.join(_APP_DIR, "vector_db")
+_EMBEDDING_CACHE_PATH = os.path.join(_VECTOR_DB_DIR, "_embed_cache.sqlite")
+_UPLOADED_FILES_DIR = os.path.join(_APP_DIR, "uploaded_files")
+_DATABASE_PATH = os.path.join(_APP_DIR, "notebooks.db")
 
 class Paths:
     """Class for managing application paths."""
@@ -11,67 +26,79 @@ class Paths:
     @staticmethod
     def get_root_dir():
         """Get the root directory of the application."""
-        return os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        return _ROOT_DIR
     
     @staticmethod
     def get_app_dir():
         """Get the application directory."""
-        return os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        return _APP_DIR
     
     @staticmethod
     def get_utils_dir():
         """Get the utils directory."""
-        return os.path.dirname(os.path.abspath(__file__))
+        return _UTILS_DIR
     
     @staticmethod
     def get_env_path():
         """Get the path to the .env file."""
-        return os.path.join(Paths.get_root_dir(), ".env")
+        return _ENV_PATH
     
     @staticmethod
     def get_config_dir():
         """Get the config directory."""
-        return os.path.join(Paths.get_app_dir(), "config")
+        return _CONFIG_DIR
     
     @staticmethod
     def get_app_config_path():
         """Get the path to the app config file."""
-        return os.path.join(Paths.get_config_dir(), "config.yaml")
+        return _APP_CONFIG_PATH
     
     @staticmethod
     def get_prompt_config_path():
         """Get the path to the prompt config file."""
-        return os.path.join(Paths.get_config_dir(), "prompt_config.yaml")
+        return _PROMPT_CONFIG_PATH
     
     @staticmethod
     def get_data_dir():
         """Get the data directory."""
-        return os.path.join(Paths.get_app_dir(), "data")
+        return _DATA_DIR
+    
+    @staticmethod
+    def get_chunk_cache_dir():
+        """Get the directory for cached document chunks."""
+        return _CHUNK_CACHE_DIR
     
     @staticmethod
     def get_vector_db_dir():
         """Get the vector database directory."""
-        return os.path.join(Paths.get_app_dir(), "vector_db")
+        return _VECTOR_DB_DIR
+    
+    @staticmethod
+    def get_embedding_cache_path():
+        """Get the path to the SQLite cache of document embeddings."""
+        return _EMBEDDING_CACHE_PATH
     
     @staticmethod
+    @lru_cache(maxsize=128)
     def get_notebook_vector_db_dir(notebook_name):
         """Get the vector database directory for a specific notebook."""
-        return os.path.join(Paths.get_vector_db_dir(), notebook_name)
+        return os.path.join(_VECTOR_DB_DIR, notebook_name)
     
     @staticmethod
     def get_uploaded_files_dir():
         """Get the uploaded files directory."""
-        return os.path.join(Paths.get_app_dir(), "uploaded_files")
+        return _UPLOADED_FILES_DIR
     
     @staticmethod
+    @lru_cache(maxsize=128)
     def get_notebook_files_dir(notebook_name):
         """Get the uploaded files directory for a specific notebook."""
-        return os.path.join(Paths.get_uploaded_files_dir(), notebook_name)
+        return os.path.join(_UPLOADED_FILES_DIR, notebook_name)
     
     @staticmethod
     def get_database_path():
         """Get the SQLite database file path."""
-        return os.path.join(Paths.get_app_dir(), "notebooks.db")
+        return _DATABASE_PATH
     
     @staticmethod
     def ensure_directories_exist():
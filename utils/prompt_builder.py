@@ -2,7 +2,72 @@
 Prompt template construction for Notebook-RAG application.
 """
 
-from typing import Union, List, Dict, Any, Optional
+import io
+from functools import lru_cache, partial
+from typing import Union, List, Dict, Any, Optional, Tuple
+
+def _write_section(lead_in: str, buf: io.StringIO, value: Union[str, List[str]]) -> None:
+    """Write a lead-in followed by text or a bulleted list."""
+    buf.write(lead_in)
+    if isinstance(value, (list, tuple)):
+        for item in value:
+            buf.write("\n- ")
+            buf.write(str(item))
+    else:
+        buf.write("\n")
+        buf.write(str(value))
+
+def _write_role(buf: io.StringIO, role: str) -> None:
+    """Write the role sentence."""
+    buf.write("You are ")
+    buf.write(PromptBuilder.lowercase_first_char(role.strip()))
+    buf.write(".")
+
+def _write_examples(buf: io.StringIO, examples: Union[str, List[str]]) -> None:
+    """Write the examples, each as its own paragraph."""
+    buf.write("Here are some examples to guide your response:")
+    if isinstance(examples, (list, tuple)):
+        for i, example in enumerate(examples, 1):
+            buf.write(f"\n\nExample {i}:\n{example}")
+    else:
+        buf.write("\n\n")
+        buf.write(str(examples))
+
+# Wrapper around the content of a task prompt, including the preceding section break
+_CONTENT_PREFIX = "\n\nHere is the content you need to work with:\n<<<BEGIN CONTENT>>>\n```\n"
+_CONTENT_SUFFIX = "\n```\n<<<END CONTENT>>>"
+
+# Sections of a task prompt in output order, as (config key, writer) pairs
+_PROMPT_SECTIONS = (
+    ("role", _write_role),
+    ("instruction", partial(_write_section, "Your task is as follows:")),
+    ("context", partial(_write_section, "Here's some background that may help you:")),
+    ("output_constraints", partial(_write_section, "Ensure your response follows these rules:")),
+    ("style_or_tone", partial(_write_section, "Follow these style and tone guidelines in your response:")),
+    ("output_format", partial(_write_section, "Structure your response as follows:")),
+    ("examples", _write_examples),
+    ("goal", partial(_write_section, "Your goal is to achieve the following outcome:")),
+)
+
+@lru_cache(maxsize=32)
+def _build_static_prefix(values: Tuple[Any, ...]) -> str:
+    """
+    Build the part of a task prompt that comes before the content, cached so that
+    chat turns sharing one prompt config only rebuild the per-turn content.
+    
+    Args:
+        values: Section values in _PROMPT_SECTIONS order, with lists as tuples.
+        
+    Returns:
+        The prompt sections joined by blank lines.
+    """
+    buf = io.StringIO()
+    for (_, write_section), value in zip(_PROMPT_SECTIONS, values):
+        if value:
+            if buf.tell():
+                buf.write("\n\n")
+            write_section(buf, value)
+    return buf.getvalue()
 
 class PromptBuilder:
     """Class for building and managing prompts."""
@@ -32,11 +97,9 @@ class PromptBuilder:
         Returns:
             A formatted string with the lead-in followed by the content.
         """
-        if isinstance(value, list):
-            formatted_value = "\n".join(f"- {item}" for item in value)
-        else:
-            formatted_value = value
-        return f"{lead_in}\n{formatted_value}"
+        buf = io.StringIO()
+        _write_section(lead_in, buf, value)
+        return buf.getvalue()
     
     @staticmethod
     def build_prompt_from_config(
@@ -58,64 +121,37 @@ class PromptBuilder:
         Raises:
             ValueError: If the required 'instruction' field is missing.
         """
-        prompt_parts = []
-        
-        if role := config.get("role"):
-            prompt_parts.append(f"You are {PromptBuilder.lowercase_first_char(role.strip())}.")
-        
-        instruction = config.get("instruction")
-        if not instruction:
+        if not config.get("instruction"):
             raise ValueError("Missing required field: 'instruction'")
-        prompt_parts.append(PromptBuilder.format_prompt_section("Your task is as follows:", instruction))
-        
-        if context := config.get("context"):
-            prompt_parts.append(f"Here's some background that may help you:\n{context}")
-        
-        if constraints := config.get("output_constraints"):
-            prompt_parts.append(
-                PromptBuilder.format_prompt_section(
-                    "Ensure your response follows these rules:", constraints
-                )
-            )
-        
-        if tone := config.get("style_or_tone"):
-            prompt_parts.append(
-                PromptBuilder.format_prompt_section(
-                    "Follow these style and tone guidelines in your response:", tone
-                )
-            )
         
-        if format_ := config.get("output_format"):
-            prompt_parts.append(
-                PromptBuilder.format_prompt_section("Structure your response as follows:", format_)
-            )
-        
-        if examples := config.get("examples"):
-            prompt_parts.append("Here are some examples to guide your response:")
-            if isinstance(examples, list):
-                for i, example in enumerate(examples, 1):
-                    prompt_parts.append(f"Example {i}:\n{example}")
-            else:
-                prompt_parts.append(str(examples))
+        values = tuple(
+            tuple(value) if isinstance(value, list) else value
+            for value in (config.get(key) for key, _ in _PROMPT_SECTIONS)
+        )
+        try:
+            prefix = _build_static_prefix(values)
+        except TypeError:
+            # Unhashable section values (e.g. nested mappings) cannot be cached
+            prefix = _build_static_prefix.__wrapped__(values)
         
-        if goal := config.get("goal"):
-            prompt_parts.append(f"Your goal is to achieve the following outcome:\n{goal}")
+        # Write the remaining parts into one buffer instead of joining intermediate strings
+        buf = io.StringIO()
+        buf.write(prefix)
         
         if input_data:
-            prompt_parts.append(
-                "Here is the content you need to work with:\n"
-                "<<<BEGIN CONTENT>>>\n"
-                "```\n" + input_data.strip() + "\n```\n<<<END CONTENT>>>"
-            )
+            buf.write(_CONTENT_PREFIX)
+            buf.write(input_data.strip())
+            buf.write(_CONTENT_SUFFIX)
         
         reasoning_strategy = config.get("reasoning_strategy")
         if reasoning_strategy and reasoning_strategy != "None" and app_config:
             strategies = app_config.get("reasoning_strategies", {})
             if strategy_text := strategies.get(reasoning_strategy):
-                prompt_parts.append(strategy_text.strip())
+                buf.write("\n\n")
+                buf.write(strategy_text.strip())
         
-        prompt_parts.append("Now perform the task as instructed above.")
-        return "\n\n".join(prompt_parts)
+        buf.write("\n\nNow perform the task as instructed above.")
+        return buf.getvalue()
     
     @staticmethod
     def build_system_prompt_from_config(
@@ -0,0 +1,56 @@
+"""
+Prompt compression for Notebook-RAG application.
+"""
+
+from functools import lru_cache
+from typing import List
+
+from .vector_store_manager import _DEVICE
+
+class PromptCompressor:
+    """Class for compressing retrieved documents before they are sent to the LLM."""
+    
+    @staticmethod
+    @lru_cache(maxsize=1)
+    def get_compressor(model_name: str = "microsoft/llmlingua-2-xlm-roberta-large-meetingbank"):
+        """
+        Get the LLMLingua-2 compressor, loading it once per process.
+        
+        Args:
+            model_name: Name of the LLMLingua-2 model.
+            
+        Returns:
+            llmlingua.PromptCompressor: The compressor.
+        """
+        from llmlingua import PromptCompressor as LLMLinguaCompressor
+        
+        # Use the device the embedding and reranker models run on
+        return LLMLinguaCompressor(
+            model_name=model_name,
+            use_llmlingua2=True,
+            device_map=_DEVICE,
+        )
+    
+    @staticmethod
+    def compress_documents(
+        documents: List[str],
+        question: str,
+        rate: float = 0.6,
+        model_name: str = "microsoft/llmlingua-2-xlm-roberta-large-meetingbank",
+    ) -> str:
+        """
+        Compress retrieved documents, keeping the tokens most relevant to answering.
+        
+        Args:
+            documents: Retrieved document texts.
+            question: The user's question.
+            rate: Fraction of tokens to keep.
+            model_name: Name of the LLMLingua-2 model.
+            
+        Returns:
+            The compressed documents as a single string.
+        """
+        compressor = PromptCompressor.get_compressor(model_name)
+        result = compressor.compress_prompt(documents, rate=rate, question=question)
+        return result["compressed_prompt"]
+
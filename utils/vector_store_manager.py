@@ -2,51 +2,424 @@
 Vector store management for Notebook-RAG application.
 """
 
+import asyncio
+import hashlib
+import multiprocessing
 import os
 import shutil
+import sqlite3
+import threading
+import time
+import numpy as np
 import torch
 import chromadb
+from chromadb.config import Settings
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
 from typing import List, Dict, Any, Optional, Union
-from pathlib import Path
 
 from langchain_huggingface import HuggingFaceEmbeddings
 
 from .paths import Paths
 
+# Resolved once at import; device availability does not change during a run
+_DEVICE = (
+    "cuda"
+    if torch.cuda.is_available()
+    else "mps" if torch.backends.mps.is_available() else "cpu"
+)
+_EMBEDDING_BATCH_SIZE = 32 if _DEVICE == "cpu" else 64
+EMBEDDING_MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+EMBEDDING_DIMENSION = 384
+_ADD_BATCH_SIZE = 512
+
+# Processes in the query embedding pool
+_EMBEDDING_POOL_WORKERS = 2
+
+# Whether this process already sized torch's CPU thread pool
+_cpu_threads_set = False
+
+def _default_cpu_threads() -> int:
+    """
+    Get the number of threads for CPU inference.
+    
+    Returns:
+        The first count in OMP_NUM_THREADS if it is set, otherwise the number of cores.
+    """
+    # OMP_NUM_THREADS may list one count per nesting level, e.g. "4,2"
+    try:
+        return max(1, int(os.environ.get("OMP_NUM_THREADS", "").split(",")[0]))
+    except ValueError:
+        return os.cpu_count() or 4
+
+# Serializes the first load, so a startup warmup and a query do not both load the model
+_embedding_model_lock = threading.Lock()
+
+@lru_cache(maxsize=1)
+def _load_embedding_model() -> HuggingFaceEmbeddings:
+    """
+    Load the embedding model once per process.
+    
+    Returns:
+        HuggingFaceEmbeddings: The embedding model.
+    """
+    # Use every core for CPU inference, unless a worker was given its share of them
+    if _DEVICE == "cpu" and not _cpu_threads_set:
+        torch.set_num_threads(_default_cpu_threads())
+    
+    model = HuggingFaceEmbeddings(
+        model_name=EMBEDDING_MODEL_NAME,
+        model_kwargs={"device": _DEVICE},
+    )
+    # Half precision doubles tensor-core throughput on GPUs; CPUs stay on FP32
+    if _DEVICE == "cuda":
+        model.client.half()
+    
+    # Run one encode now so device and kernel initialization do not land on the first query
+    try:
+        with torch.inference_mode():
+            model.client.encode(["warmup"], batch_size=1, convert_to_numpy=True, show_progress_bar=False)
+    except Exception as e:
+        print(f"Embedding model warmup failed: {str(e)}")
+    return model
+
+# Shared by every client; telemetry off avoids starting the posthog client on each open
+_CHROMA_SETTINGS = Settings(anonymized_telemetry=False, allow_reset=False)
+
+# Open clients and collections, reused so each chat turn skips reopening SQLite and the HNSW index
+_CLIENT_CACHE: Dict[str, chromadb.ClientAPI] = {}
+_COLLECTION_CACHE: Dict[str, chromadb.Collection] = {}
+
+def _get_client(persist_directory: str) -> chromadb.ClientAPI:
+    """
+    Get the persistent ChromaDB client for a directory, creating it once.
+    
+    Args:
+        persist_directory: Directory of the vector store.
+        
+    Returns:
+        The ChromaDB client.
+    """
+    client = _CLIENT_CACHE.get(persist_directory)
+    if client is None:
+        client = chromadb.PersistentClient(path=persist_directory, settings=_CHROMA_SETTINGS)
+        _CLIENT_CACHE[persist_directory] = client
+    return client
+
+def _evict_notebook(notebook_name: str, persist_directory: str) -> None:
+    """
+    Drop the cached client and collection of a notebook whose store is being removed.
+    
+    Chroma shares one system (and its SQLite handles) per path, so the evicted client
+    is closed as well; otherwise a store recreated at the same path would be written
+    through the deleted database. Only this path's system is stopped: clients of other
+    notebooks stay open and registered. chromadb 1.x provides client.close(); on older
+    versions the path's system is stopped and removed from the shared registry directly.
+    
+    Args:
+        notebook_name: Name of the notebook.
+        persist_directory: Directory of the notebook's vector store.
+    """
+    _COLLECTION_CACHE.pop(notebook_name, None)
+    client = _CLIENT_CACHE.pop(persist_directory, None)
+    if client is None:
+        return
+    
+    if hasattr(client, "close"):
+        client.close()
+        return
+    
+    try:
+        from chromadb.api.shared_system_client import SharedSystemClient
+        
+        system = SharedSystemClient._identifier_to_system.pop(persist_directory, None)
+        if system is not None:
+            system.stop()
+    except Exception as e:
+        print(f"Error closing ChromaDB client: {str(e)}")
+
+# Cached embeddings are only valid for the model and precision that produced them
+_EMBEDDING_CACHE_MODEL_KEY = f"{EMBEDDING_MODEL_NAME}:{'float16' if _DEVICE == 'cuda' else 'float32'}"
+
+# Least recently used embeddings beyond this are pruned (about 1.5 KB each); pruning
+# runs when the cache is opened and whenever inserts pass the limit by a tenth
+EMBEDDING_CACHE_MAX_ENTRIES = 200_000
+_EMBEDDING_CACHE_PRUNE_SLACK = EMBEDDING_CACHE_MAX_ENTRIES // 10
+
+# Rows in the cache, counted after each prune and advanced by inserts
+_embedding_cache_rows = 0
+
+# One embedding cache connection shared by all threads, opened on first use;
+# the lock serializes statements and transactions
+_embedding_cache_conn: Optional[sqlite3.Connection] = None
+_embedding_cache_lock = threading.RLock()
+
+# Stay below SQLite's default limit of 999 host parameters per statement
+_SQLITE_MAX_PARAMS = 900
+
+def _get_embedding_cache() -> sqlite3.Connection:
+    """
+    Get the shared connection to the embedding cache, opening and pruning it on first use.
+    
+    Callers must hold _embedding_cache_lock while using the connection.
+    
+    Returns:
+        sqlite3.Connection: Cache connection.
+    """
+    global _embedding_cache_conn
+    with _embedding_cache_lock:
+        if _embedding_cache_conn is None:
+            cache_path = Paths.get_embedding_cache_path()
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            conn = sqlite3.connect(cache_path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS document_embeddings ("
+                    "model TEXT NOT NULL, hash BLOB NOT NULL, vec BLOB NOT NULL, last_used REAL NOT NULL, "
+                    "PRIMARY KEY (model, hash))"
+                )
+                conn.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_document_embeddings_last_used "
+                    "ON document_embeddings (last_used)"
+                )
+            _embedding_cache_conn = conn
+            VectorStoreManager.prune_embedding_cache()
+        return _embedding_cache_conn
+
+def _record_embedding_cache_inserts(count: int) -> None:
+    """
+    Count rows inserted into the embedding cache, pruning it once they pass the bound.
+    
+    Callers must hold _embedding_cache_lock.
+    
+    Args:
+        count: Number of rows inserted.
+    """
+    global _embedding_cache_rows
+    _embedding_cache_rows += count
+    if _embedding_cache_rows > EMBEDDING_CACHE_MAX_ENTRIES + _EMBEDDING_CACHE_PRUNE_SLACK:
+        VectorStoreManager.prune_embedding_cache()
+
+def _init_embedding_worker(num_threads: int) -> None:
+    """
+    Load the embedding model once when an embedding worker process starts.
+    
+    Args:
+        num_threads: This worker's share of the threads for CPU inference.
+    """
+    global _cpu_threads_set
+    if _DEVICE == "cpu":
+        torch.set_num_threads(num_threads)
+        _cpu_threads_set = True
+    VectorStoreManager.get_embedding_model()
+
+# Worker pool for query embeddings, created on first use; the lock makes
+# concurrent first calls share one pool
+_embedding_pool: Optional[ProcessPoolExecutor] = None
+_embedding_pool_lock = threading.Lock()
+
+def _get_embedding_pool() -> ProcessPoolExecutor:
+    """
+    Get the worker pool used to embed queries off the event loop, created once per process.
+    
+    Returns:
+        The process pool.
+    """
+    global _embedding_pool
+    pool = _embedding_pool
+    if pool is None:
+        with _embedding_pool_lock:
+            if _embedding_pool is None:
+                _embedding_pool = ProcessPoolExecutor(
+                    max_workers=_EMBEDDING_POOL_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_embedding_worker,
+                    # Split the cores between workers instead of each claiming all of them
+                    initargs=(max(1, _default_cpu_threads() // _EMBEDDING_POOL_WORKERS),),
+                )
+            pool = _embedding_pool
+    return pool
+
+def _discard_embedding_pool(pool: ProcessPoolExecutor) -> None:
+    """
+    Discard a broken embedding worker pool, so the next query creates a new one.
+    
+    Args:
+        pool: The pool that broke; a replacement created meanwhile is kept.
+    """
+    global _embedding_pool
+    with _embedding_pool_lock:
+        if _embedding_pool is pool:
+            _embedding_pool = None
+    pool.shutdown(wait=False)
+
 class VectorStoreManager:
     """Class for managing ChromaDB vector stores for notebooks."""
     
     @staticmethod
     def get_embedding_model():
         """
-        Get the embedding model.
+        Get the embedding model, loading it once per process.
         
         Returns:
             HuggingFaceEmbeddings: The embedding model.
         """
-        device = (
-            "cuda"
-            if torch.cuda.is_available()
-            else "mps" if torch.backends.mps.is_available() else "cpu"
-        )
-        return HuggingFaceEmbeddings(
-            model_name="sentence-transformers/all-MiniLM-L6-v2",
-            model_kwargs={"device": device},
-        )
+        with _embedding_model_lock:
+            return _load_embedding_model()
     
     @staticmethod
-    def embed_documents(documents: List[str]) -> List[List[float]]:
+    @lru_cache(maxsize=2)
+    def get_reranker_model(model_name: str = "BAAI/bge-reranker-base"):
+        """
+        Get the cross-encoder used to rerank retrieved documents, loading it once per process.
+        
+        Args:
+            model_name: Name of the cross-encoder model.
+            
+        Returns:
+            CrossEncoder: The reranker model.
+        """
+        from sentence_transformers import CrossEncoder
+        
+        return CrossEncoder(model_name, device=_DEVICE)
+    
+    @staticmethod
+    def rerank_documents(
+        query: str,
+        documents: List[str],
+        top_k: int,
+        model_name: str = "BAAI/bge-reranker-base"
+    ) -> List[str]:
+        """
+        Rerank documents by cross-encoder relevance to a query.
+        
+        Args:
+            query: Query text.
+            documents: Candidate document texts.
+            top_k: Number of documents to keep.
+            model_name: Name of the cross-encoder model.
+            
+        Returns:
+            The top_k most relevant documents, most relevant first.
+        """
+        if len(documents) <= 1:
+            return documents[:top_k]
+        
+        model = VectorStoreManager.get_reranker_model(model_name)
+        scores = model.predict([(query, document) for document in documents])
+        ranked = sorted(zip(scores, documents), key=lambda pair: pair[0], reverse=True)
+        return [document for _, document in ranked[:top_k]]
+    
+    @staticmethod
+    def embed_documents(documents: List[str], use_cache: bool = True) -> np.ndarray:
         """
         Embed documents using the embedding model.
         
         Args:
             documents: List of document texts to embed.
+            use_cache: Whether to reuse embeddings of previously embedded texts.
             
         Returns:
-            List of document embeddings.
+            Matrix of L2-normalized document embeddings, one row per document.
+        """
+        if not documents:
+            return np.empty((0, EMBEDDING_DIMENSION), dtype=np.float32)
+        
+        hashes = [hashlib.sha256(document.encode("utf-8")).digest() for document in documents]
+        
+        # Repeated chunks (headers, boilerplate) are embedded once and expanded afterwards
+        unique_documents = dict(zip(hashes, documents))
+        embeddings_by_hash = {}
+        
+        # Look up cached embeddings in batches of host parameters
+        if use_cache:
+            unique_hashes = list(unique_documents)
+            with _embedding_cache_lock:
+                conn = _get_embedding_cache()
+                for start in range(0, len(unique_hashes), _SQLITE_MAX_PARAMS):
+                    batch = unique_hashes[start:start + _SQLITE_MAX_PARAMS]
+                    placeholders = ",".join("?" * len(batch))
+                    embeddings_by_hash.update(conn.execute(
+                        f"SELECT hash, vec FROM document_embeddings WHERE model = ? AND hash IN ({placeholders})",
+                        [_EMBEDDING_CACHE_MODEL_KEY, *batch]
+                    ))
+                
+                # Mark hits as recently used so pruning keeps them
+                now = time.time()
+                with conn:
+                    conn.executemany(
+                        "UPDATE document_embeddings SET last_used = ? WHERE model = ? AND hash = ?",
+                        [(now, _EMBEDDING_CACHE_MODEL_KEY, digest) for digest in embeddings_by_hash]
+                    )
+        
+        # Embed only the texts not found in the cache
+        missing = [digest for digest in unique_documents if digest not in embeddings_by_hash]
+        if missing:
+            new_embeddings = VectorStoreManager._encode_documents([unique_documents[digest] for digest in missing])
+            rows = [(digest, new_embeddings[row].tobytes()) for row, digest in enumerate(missing)]
+            if use_cache:
+                now = time.time()
+                with _embedding_cache_lock:
+                    conn = _get_embedding_cache()
+                    with conn:
+                        conn.executemany(
+                            "INSERT OR REPLACE INTO document_embeddings (model, hash, vec, last_used) VALUES (?, ?, ?, ?)",
+                            [(_EMBEDDING_CACHE_MODEL_KEY, digest, vec, now) for digest, vec in rows]
+                        )
+                    _record_embedding_cache_inserts(len(rows))
+            embeddings_by_hash.update(rows)
+        
+        # Reassemble in the original order
+        return np.vstack([np.frombuffer(embeddings_by_hash[digest], dtype=np.float32) for digest in hashes])
+    
+    @staticmethod
+    def prune_embedding_cache(max_entries: int = EMBEDDING_CACHE_MAX_ENTRIES) -> None:
+        """
+        Drop cached embeddings of other models and the least recently used ones beyond max_entries.
+        
+        Args:
+            max_entries: Maximum number of cached embeddings to keep.
+        """
+        global _embedding_cache_rows
+        with _embedding_cache_lock:
+            conn = _get_embedding_cache()
+            with conn:
+                conn.execute(
+                    "DELETE FROM document_embeddings WHERE model != ?", (_EMBEDDING_CACHE_MODEL_KEY,)
+                )
+                conn.execute(
+                    "DELETE FROM document_embeddings WHERE rowid IN ("
+                    "SELECT rowid FROM document_embeddings ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                    (max_entries,)
+                )
+            _embedding_cache_rows = conn.execute("SELECT COUNT(*) FROM document_embeddings").fetchone()[0]
+    
+    @staticmethod
+    def _encode_documents(documents: List[str]) -> np.ndarray:
+        """
+        Run the embedding model over documents.
+        
+        Args:
+            documents: List of document texts to embed.
+            
+        Returns:
+            Float32 matrix of L2-normalized document embeddings, one row per document.
         """
         model = VectorStoreManager.get_embedding_model()
-        return model.embed_documents(documents)
+        # Call the SentenceTransformer directly so embeddings stay in one
+        # ndarray instead of being converted to lists of Python floats
+        with torch.inference_mode():
+            embeddings = model.client.encode(
+                documents,
+                batch_size=_EMBEDDING_BATCH_SIZE,
+                convert_to_numpy=True,
+                normalize_embeddings=True,
+                show_progress_bar=False,
+            )
+        return embeddings.astype(np.float32, copy=False)
     
     @staticmethod
     def embed_query(query: str) -> List[float]:
@@ -57,10 +430,37 @@ class VectorStoreManager:
             query: Query text to embed.
             
         Returns:
-            Query embedding.
+            L2-normalized query embedding.
         """
         model = VectorStoreManager.get_embedding_model()
-        return model.embed_query(query)
+        with torch.inference_mode():
+            return model.client.encode(
+                query,
+                convert_to_numpy=True,
+                normalize_embeddings=True,
+                show_progress_bar=False,
+            ).tolist()
+    
+    @staticmethod
+    async def aembed_query(query: str) -> List[float]:
+        """
+        Embed a query in a worker process, so concurrent queries use several cores
+        instead of contending for the GIL.
+        
+        Args:
+            query: Query text to embed.
+            
+        Returns:
+            Query embedding.
+        """
+        loop = asyncio.get_running_loop()
+        pool = _get_embedding_pool()
+        try:
+            return await loop.run_in_executor(pool, VectorStoreManager.embed_query, query)
+        except BrokenProcessPool:
+            # A worker died; replace the pool for later queries and embed this one in a thread
+            _discard_embedding_pool(pool)
+            return await asyncio.to_thread(VectorStoreManager.embed_query, query)
     
     @staticmethod
     def initialize_collection(
@@ -79,13 +479,14 @@ class VectorStoreManager:
         """
         persist_directory = Paths.get_notebook_vector_db_dir(notebook_name)
         
-        if os.path.exists(persist_directory) and delete_existing:
-            shutil.rmtree(persist_directory)
+        if delete_existing:
+            _evict_notebook(notebook_name, persist_directory)
+            shutil.rmtree(persist_directory, ignore_errors=True)
         
         os.makedirs(persist_directory, exist_ok=True)
         
         # Initialize ChromaDB client with persistent storage
-        client = chromadb.PersistentClient(path=persist_directory)
+        client = _get_client(persist_directory)
         
         # Create or get a collection
         try:
@@ -97,12 +498,13 @@ class VectorStoreManager:
             collection = client.create_collection(
                 name=notebook_name,
                 metadata={
-                    "hnsw:space": "cosine",
+                    "hnsw:space": "ip",
                     "hnsw:batch_size": 10000,
-                },  # Use cosine distance for semantic search
+                },  # Embeddings are normalized, so inner product ranks like cosine
             )
             print(f"Created new collection for notebook: {notebook_name}")
         
+        _COLLECTION_CACHE[notebook_name] = collection
         return collection
     
     @staticmethod
@@ -119,13 +521,18 @@ class VectorStoreManager:
         Raises:
             FileNotFoundError: If the collection does not exist.
         """
+        collection = _COLLECTION_CACHE.get(notebook_name)
+        if collection is not None:
+            return collection
+        
         persist_directory = Paths.get_notebook_vector_db_dir(notebook_name)
         
         if not os.path.exists(persist_directory):
             raise FileNotFoundError(f"Vector store for notebook '{notebook_name}' does not exist.")
         
-        client = chromadb.PersistentClient(path=persist_directory)
-        return client.get_collection(name=notebook_name)
+        collection = _get_client(persist_directory).get_collection(name=notebook_name)
+        _COLLECTION_CACHE[notebook_name] = collection
+        return collection
     
     @staticmethod
     def add_documents(
@@ -136,40 +543,99 @@ class VectorStoreManager:
         """
         Add documents to a ChromaDB collection.
         
+        If any batch fails, the documents this call already added are removed
+        before the error is re-raised.
+        
         Args:
             collection: The ChromaDB collection.
             documents: List of document texts to add.
             metadata: Optional list of metadata for each document.
         """
         next_id = collection.count()
+        added_ids = []
         
-        # Generate embeddings for the documents
-        embeddings = VectorStoreManager.embed_documents(documents)
+        # Embed and insert in fixed-size batches so peak memory is bounded by the
+        # batch, and insert each batch in the background while the next is embedded
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            pending = None
+            try:
+                for start in range(0, len(documents), _ADD_BATCH_SIZE):
+                    end = start + _ADD_BATCH_SIZE
+                    batch = documents[start:end]
+                    
+                    # Generate embeddings for the batch, kept as one contiguous float32
+                    # matrix that Chroma copies without boxing each value
+                    embeddings = VectorStoreManager.embed_documents(batch)
+                    
+                    # Generate IDs for the batch
+                    ids = [f"document_{i}" for i in range(next_id + start, next_id + start + len(batch))]
+                    
+                    # Keep inserts in order so IDs stay contiguous
+                    if pending is not None:
+                        pending.result()
+                    added_ids += ids
+                    pending = executor.submit(
+                        collection.add,
+                        embeddings=embeddings,
+                        ids=ids,
+                        documents=batch,
+                        metadatas=metadata[start:end] if metadata else None
+                    )
+                
+                if pending is not None:
+                    pending.result()
+            except Exception:
+                # Wait for the insert in flight, then remove every batch of this call, so a
+                # failed add leaves the collection unchanged and can simply be retried
+                if pending is not None:
+                    try:
+                        pending.result()
+                    except Exception:
+                        pass
+                if added_ids:
+                    collection.delete(ids=added_ids)
+                raise
+    
+    @staticmethod
+    def add_documents_bulk(
+        collection: chromadb.Collection,
+        document_groups: List[List[str]],
+        metadata: Optional[List[Dict[str, Any]]] = None
+    ) -> None:
+        """
+        Add several groups of documents to a ChromaDB collection in one call.
         
-        # Generate IDs for the documents
-        ids = [f"document_{i}" for i in range(next_id, next_id + len(documents))]
+        Args:
+            collection: The ChromaDB collection.
+            document_groups: List of document text lists, e.g. the chunks of each file.
+            metadata: Optional list of metadata shared by all documents in each group.
+        """
+        documents = [document for group in document_groups for document in group]
+        if not documents:
+            return
         
-        # Add documents to the collection
         if metadata:
-            collection.add(
-                embeddings=embeddings,
-                ids=ids,
-                documents=documents,
-                metadatas=metadata
-            )
-        else:
-            collection.add(
-                embeddings=embeddings,
-                ids=ids,
-                documents=documents
-            )
+            # Chroma does not mutate metadata, so each group shares one dict
+            expanded_metadata = []
+            for group, group_metadata in zip(document_groups, metadata):
+                expanded_metadata += [group_metadata] * len(group)
+            metadata = expanded_metadata
+        
+        VectorStoreManager.add_documents(
+            collection=collection,
+            documents=documents,
+            metadata=metadata
+        )
     
     @staticmethod
     def retrieve_relevant_documents(
         notebook_name: str,
         query: str,
         n_results: int = 5,
-        threshold: float = 0.3
+        threshold: float = 0.3,
+        query_embedding: Optional[List[float]] = None,
+        rerank_k: Optional[int] = None,
+        reranker_model: str = "BAAI/bge-reranker-base"
     ) -> List[str]:
         """
         Retrieve relevant documents from a notebook's vector store.
@@ -179,6 +645,9 @@ class VectorStoreManager:
             query: Query text.
             n_results: Number of results to retrieve.
             threshold: Similarity threshold.
+            query_embedding: Optional precomputed embedding of the query.
+            rerank_k: If set, fetch this many candidates and rerank them down to n_results.
+            reranker_model: Name of the cross-encoder used for reranking.
             
         Returns:
             List of relevant document texts.
@@ -190,20 +659,25 @@ class VectorStoreManager:
         collection = VectorStoreManager.get_collection(notebook_name)
         
         # Embed the query
-        query_embedding = VectorStoreManager.embed_query(query)
+        if query_embedding is None:
+            query_embedding = VectorStoreManager.embed_query(query)
         
         # Query the collection
         results = collection.query(
             query_embeddings=[query_embedding],
-            n_results=n_results,
+            n_results=max(n_results, rerank_k or 0),
             include=["documents", "distances"],
         )
         
         # Filter results by threshold
-        relevant_documents = []
-        for i, distance in enumerate(results["distances"][0]):
-            if distance < threshold:
-                relevant_documents.append(results["documents"][0][i])
+        documents = results["documents"][0]
+        keep = np.flatnonzero(np.asarray(results["distances"][0]) < threshold)
+        relevant_documents = [documents[i] for i in keep]
+        
+        if rerank_k:
+            relevant_documents = VectorStoreManager.rerank_documents(
+                query, relevant_documents, n_results, reranker_model
+            )
         
         return relevant_documents
     
@@ -220,10 +694,9 @@ class VectorStoreManager:
         if not os.path.exists(vector_db_dir):
             return []
         
-        return [
-            d for d in os.listdir(vector_db_dir)
-            if os.path.isdir(os.path.join(vector_db_dir, d))
-        ]
+        # DirEntry.is_dir() reuses the file type from readdir instead of a stat per entry
+        with os.scandir(vector_db_dir) as entries:
+            return [entry.name for entry in entries if entry.is_dir()]
     
     @staticmethod
     def delete_notebook(notebook_name: str) -> bool:
@@ -244,7 +717,7 @@ class VectorStoreManager:
         # First, try to close any open connections to the ChromaDB collection
         try:
             # Create a client to the collection's directory
-            client = chromadb.PersistentClient(path=notebook_dir)
+            client = _get_client(notebook_dir)
             
             # Get the collection if it exists
             try:
@@ -255,6 +728,9 @@ class VectorStoreManager:
                 # Collection might not exist or other error
                 pass
             
+            # Take the cached client out of circulation so it is not reused after deletion
+            _evict_notebook(notebook_name, notebook_dir)
+            
             # Explicitly delete client to close connections
             try:
                 del collection
@@ -266,15 +742,18 @@ class VectorStoreManager:
             except:
                 pass
             
-            # Force garbage collection to release file handles
-            import gc
-            gc.collect()
+            # Force garbage collection to release file handles (Windows only,
+            # other platforms can remove files that are still open)
+            if os.name == 'nt':
+                import gc
+                gc.collect()
         except Exception as e:
             print(f"Error closing ChromaDB connections: {str(e)}")
         
         # Wait a moment to ensure file handles are released
-        import time
-        time.sleep(1)
+        if os.name == 'nt':
+            import time
+            time.sleep(1)
         
         # Try to delete directory with multiple approaches
         success = False